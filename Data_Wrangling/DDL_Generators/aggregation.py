@@ -0,0 +1,146 @@
+# Group-by kernel rolling Prescription_Data rows up to a coarser grain, e.g. zip -> county,
+# county -> state or several years into one.
+#
+# Rows are assigned group ids once and every measure is reduced with np.bincount over numeric
+# arrays, so a rollup is a single pass over the data however many measures it has.
+import numpy as np
+import pandas as pd
+
+# Prescription_Data count columns, summed by rollup_prescriptions
+prescription_sums = ['Total_Prescriptions', 'Total_Units', 'Total_Patients', 'Total_Days_Supply']
+
+# Counts that are only reported for some drugs; the total is unknown if any row lacks the count
+prescription_null_aware_sums = ['Total_Above_90MME']
+
+# Averages, with the count they are weighted by
+prescription_weighted_means = {'Average_Daily_MME': 'Total_Prescriptions'}
+
+
+def key_codes(values):
+    """
+    Returns integer codes of a key column, 0 standing for missing values.
+
+    Args:
+        values (pandas.Series): Key column.
+
+    Returns:
+        tuple: (int64 array of codes, number of distinct codes including 0).
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, size = values.cat.codes.to_numpy(), len(values.cat.categories)
+    else:
+        codes, uniques = pd.factorize(values)
+        size = len(uniques)
+    return codes.astype(np.int64) + 1, size + 1
+
+
+def group_ids(data, keys):
+    """
+    Numbers the groups of rows sharing the same key values, in order of first appearance.
+
+    The key columns' codes are combined into one integer per row, so grouping is a single
+    factorization of an int64 array. Missing key values form groups of their own.
+
+    Args:
+        data (pandas.DataFrame): Rows to group.
+        keys (list): Key column names.
+
+    Returns:
+        tuple: (int64 array of group ids per row, int64 array of the first row position of each group).
+    """
+    combined = np.zeros(len(data), dtype=np.int64)
+    for key in keys:
+        codes, size = key_codes(data[key])
+        if size > 1 and combined.max(initial=0) > (np.iinfo(np.int64).max - size) // size:
+            # The combined codes would overflow; number the groups by the codes so far instead
+            combined = pd.factorize(combined)[0].astype(np.int64)
+        combined = combined * size + codes
+
+    ids = pd.factorize(combined)[0].astype(np.int64)
+
+    # Ids are assigned in order of first appearance, so a group starts wherever the id exceeds every earlier id
+    first_rows = np.flatnonzero(ids > np.maximum.accumulate(np.concatenate([[-1], ids[:-1]])))
+    return ids, first_rows
+
+
+def rollup(data, keys, sums=(), null_aware_sums=(), weighted_means=None):
+    """
+    Aggregates rows sharing the same key values.
+
+    Args:
+        data (pandas.DataFrame): Rows to aggregate.
+        keys (list): Key column names; the result holds one row per distinct combination.
+        sums (list): Columns summed, missing values counting as 0.
+        null_aware_sums (list): Columns summed, missing for groups where any row is missing the value.
+        weighted_means (dict): Column -> weight column. The mean is weighted by the weight column over
+            the rows holding a value; groups whose weight is 0 or missing on all of those rows fall
+            back to the unweighted mean, groups whose rows all hold the same value keep that exact
+            value and groups without values are missing.
+
+    Returns:
+        pandas.DataFrame: Key columns followed by the aggregated columns (float64), in order of
+        first appearance of each group.
+    """
+    ids, first_rows = group_ids(data, keys)
+    groups = len(first_rows)
+
+    aggregated = data[keys].iloc[first_rows].reset_index(drop=True)
+
+    def column_sum(weights):
+        return np.bincount(ids, weights=weights, minlength=groups)
+
+    def numbers(col):
+        return pd.to_numeric(data[col], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+
+    for col in sums:
+        aggregated[col] = column_sum(np.nan_to_num(numbers(col)))
+
+    for col in null_aware_sums:
+        values = numbers(col)
+        missing = np.isnan(values)
+        aggregated[col] = np.where(column_sum(missing) > 0, np.nan, column_sum(np.where(missing, 0, values)))
+
+    for col, weight_col in (weighted_means or {}).items():
+        values = numbers(col)
+        present = ~np.isnan(values)
+        weights = np.where(present, np.nan_to_num(numbers(weight_col)), 0)
+
+        counts = column_sum(present)
+        weight_totals = column_sum(weights)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weighted = column_sum(np.where(present, values, 0) * weights) / weight_totals
+            unweighted = column_sum(np.where(present, values, 0)) / counts
+        means = np.where(weight_totals > 0, weighted, unweighted)
+
+        # Groups holding a single distinct value keep it as is, e.g. 18.79 rather than 18.790000000000003
+        lowest = np.full(groups, np.inf)
+        highest = np.full(groups, -np.inf)
+        np.minimum.at(lowest, ids[present], values[present])
+        np.maximum.at(highest, ids[present], values[present])
+        aggregated[col] = np.where(counts == 0, np.nan, np.where(lowest == highest, lowest, means))
+
+    return aggregated
+
+
+def rollup_prescriptions(data, keys):
+    """
+    Aggregates Prescription_Data rows with the standard measure semantics.
+
+    Counts are summed, Total_Above_90MME is summed unless a row of the group lacks it and
+    Average_Daily_MME is weighted by Total_Prescriptions. Measures missing from data are skipped,
+    e.g. the patient counts of the 2013-2017 reports.
+
+    Args:
+        data (pandas.DataFrame): Transformed Prescription_Data rows.
+        keys (list): Key column names, e.g. every column except the measures and the dropped stratum.
+
+    Returns:
+        pandas.DataFrame: Aggregated rows, see rollup.
+    """
+    return rollup(
+        data,
+        keys,
+        sums=[col for col in prescription_sums if col in data],
+        null_aware_sums=[col for col in prescription_null_aware_sums if col in data],
+        weighted_means={col: weight for col, weight in prescription_weighted_means.items() if col in data and weight in data}
+    )
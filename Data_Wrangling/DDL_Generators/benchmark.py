@@ -0,0 +1,237 @@
+import argparse
+import json
+import platform
+import tempfile
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import generate_CS
+from synthetic_reports import synthetic_worksheets
+from workbook_cache import read_worksheet
+from validation import validate
+from year_layouts import year_layouts
+from row_filters import year_filters, pushdown, apply_filters
+from sql_writer import batched_inserts
+
+try:
+    import openpyxl
+except ImportError:  # only needed to benchmark parsing with --parse
+    openpyxl = None
+
+# Directory benchmark results are written to
+results_dir = Path('Processed_Data/Benchmarks')
+
+# Pipeline stages, in the order they run
+stages = ['parse', 'pushdown', 'normalize', 'map', 'validate', 'convert', 'aggregate', 'render', 'write']
+
+
+def parse_worksheets(worksheets, layout, workbook_dir):
+    """
+    Writes synthetic worksheets to an .xlsx workbook and times parsing them back.
+
+    Args:
+        worksheets (dict): Worksheet DataFrames returned by synthetic_worksheets.
+        layout (dict): Year layout spec.
+        workbook_dir (Path): Directory the workbook is written to.
+
+    Returns:
+        tuple: (parsed worksheets keyed by worksheet name, seconds spent parsing).
+    """
+    workbook = Path(workbook_dir) / Path(layout['workbook']).with_suffix('.xlsx').name
+    with pd.ExcelWriter(workbook) as writer:
+        for sheet_name, df in worksheets.items():
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+
+    start = time.perf_counter()
+    parsed = {sheet_name: read_worksheet(workbook, sheet_name, use_cache=False, usecols=layout['usecols'][sheet_name], dtype=layout['dtypes'])
+              for sheet_name in layout['worksheets']}
+    return parsed, time.perf_counter() - start
+
+
+def run_year(year, rows, seed=0, parse=False, batch_size=1, workbook_dir=None):
+    """
+    Runs every pipeline stage once on synthetic worksheets for a reporting year.
+
+    Args:
+        year (int): Reporting year, must be a key of year_layouts.
+        rows (int): Number of data rows per worksheet.
+        seed (int): Random seed passed to synthetic_worksheets.
+        parse (bool): Whether the worksheets are round-tripped through an .xlsx workbook and parsing is timed.
+        batch_size (int): Maximum number of rows per INSERT statement in the render and write stages.
+        workbook_dir (Path): Directory workbooks and SQL files are written to.
+
+    Returns:
+        dict: Seconds per stage ('parse' only with parse, 'aggregate' only for zip-level years), 'rows'
+        and 'output_rows' counts and the 'bytes_per_row' of the converted (and aggregated) frame.
+    """
+    layout = year_layouts[year]
+    filters = year_filters(layout)
+    worksheets = synthetic_worksheets(year, rows, seed)
+    timings = {}
+
+    if parse:
+        worksheets, timings['parse'] = parse_worksheets(worksheets, layout, workbook_dir)
+
+    # Same as generate_CS.read_worksheets: keep the layout's columns, drop each worksheet's summary row and combine
+    data = generate_CS.combine_worksheets({sheet_name: worksheets[sheet_name][layout['usecols'][sheet_name]] for sheet_name in layout['worksheets']})
+    input_rows = len(data)
+
+    start = time.perf_counter()
+    data = pushdown(data, filters, layout)
+    timings['pushdown'] = time.perf_counter() - start
+
+    data['Prescription_Year'] = year
+
+    start = time.perf_counter()
+    data = generate_CS.normalize(data, layout)
+    timings['normalize'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    data = generate_CS.map_drugs(data, layout)
+    timings['map'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    validate(data, layout)
+    timings['validate'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    data = generate_CS.convert_columns(data, layout)
+    timings['convert'] = time.perf_counter() - start
+
+    if layout['aggregate_zip']:
+        start = time.perf_counter()
+        data = generate_CS.aggregate_zip_rows(data)
+        timings['aggregate'] = time.perf_counter() - start
+
+    bytes_per_row = data.memory_usage(deep=True).sum() / max(len(data), 1)
+
+    data = apply_filters(data, filters)
+
+    start = time.perf_counter()
+    for _ in batched_inserts(generate_CS.prescription_insert_prefix(year), generate_CS.insert_values(data, year), batch_size):
+        pass
+    timings['render'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    generate_CS.write_year(year, data, workbook_dir, batch_size)
+    timings['write'] = time.perf_counter() - start
+
+    return {**timings, 'rows': input_rows, 'output_rows': len(data), 'bytes_per_row': bytes_per_row}
+
+
+def run_benchmarks(years, rows, repeat=1, seed=0, parse=False, batch_size=1):
+    """
+    Benchmarks every pipeline stage for several reporting years, keeping the fastest of repeat runs.
+
+    Args:
+        years (iterable): Reporting years.
+        rows (int): Number of data rows per worksheet.
+        repeat (int): Number of runs per year.
+        seed (int): Random seed passed to synthetic_worksheets.
+        parse (bool): Whether worksheet parsing is benchmarked as well.
+        batch_size (int): Maximum number of rows per INSERT statement.
+
+    Returns:
+        dict: Benchmark results, as saved to JSON.
+    """
+    results = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'rows': rows,
+        'repeat': repeat,
+        'seed': seed,
+        'batch_size': batch_size,
+        'years': {}
+    }
+
+    with tempfile.TemporaryDirectory() as workbook_dir:
+        for year in years:
+            runs = [run_year(year, rows, seed, parse, batch_size, workbook_dir) for _ in range(repeat)]
+            results['years'][str(year)] = {
+                'rows': runs[0]['rows'],
+                'output_rows': runs[0]['output_rows'],
+                'bytes_per_row': runs[0]['bytes_per_row'],
+                'seconds': {stage: min(run[stage] for run in runs) for stage in stages if stage in runs[0]}
+            }
+
+    return results
+
+
+def results_table(results, baseline=None):
+    """
+    Formats benchmark results as a plain-text table, with speedups against a baseline run if given.
+
+    Args:
+        results (dict): Results returned by run_benchmarks.
+        baseline (dict): Earlier results loaded from JSON.
+
+    Returns:
+        str: Table with one line per year and stage.
+    """
+    lines = [f"{'Year':<6}{'Stage':<11}{'Seconds':>10}{'Rows/s':>14}" + (f"{'Speedup':>10}" if baseline else '')]
+
+    for year, year_results in results['years'].items():
+        for stage, seconds in year_results['seconds'].items():
+            line = f"{year:<6}{stage:<11}{seconds:>10.3f}{year_results['rows'] / max(seconds, 1e-9):>14,.0f}"
+            if baseline:
+                baseline_seconds = baseline['years'].get(year, {}).get('seconds', {}).get(stage)
+                line += f"{baseline_seconds / max(seconds, 1e-9):>9.2f}x" if baseline_seconds else f"{'-':>10}"
+            lines.append(line)
+        if 'bytes_per_row' in year_results:
+            lines.append(f"{year:<6}{'bytes/row':<11}{year_results['bytes_per_row']:>10.0f}")
+
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the DDL generator stages on synthetic Drug Utilization Report data.')
+    parser.add_argument('years', nargs='*', type=int, default=sorted(year_layouts),
+                        help='Reporting years to benchmark (default: all years)')
+    parser.add_argument('--rows', type=int, default=100000,
+                        help='Data rows per synthetic worksheet (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='Runs per year, the fastest run of each stage is reported (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Random seed of the synthetic data (default: %(default)s)')
+    parser.add_argument('--batch-size', type=int, default=1,
+                        help='Rows per INSERT statement in the render and write stages (default: %(default)s)')
+    parser.add_argument('--parse', action='store_true',
+                        help='Also benchmark parsing by round-tripping the worksheets through .xlsx (requires openpyxl, '
+                             'slow to set up for large row counts and limited to 1,048,575 rows per worksheet)')
+    parser.add_argument('--output', type=Path,
+                        help='JSON results file (default: Processed_Data/Benchmarks/benchmark-<timestamp>.json)')
+    parser.add_argument('--baseline', type=Path,
+                        help='Earlier JSON results file to compare against')
+    args = parser.parse_args(argv)
+
+    unknown_years = [year for year in args.years if year not in year_layouts]
+    if unknown_years:
+        parser.error(f"No layout defined for year(s): {', '.join(map(str, unknown_years))}")
+
+    if args.rows < 1 or args.repeat < 1 or args.batch_size < 1:
+        parser.error('--rows, --repeat and --batch-size must be 1 or greater')
+
+    if args.parse and openpyxl is None:
+        parser.error('--parse requires openpyxl (pip install openpyxl)')
+
+    if args.parse and args.rows > 1048575:
+        parser.error('--parse is limited to 1,048,575 rows per worksheet')
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+
+    results = run_benchmarks(args.years, args.rows, args.repeat, args.seed, args.parse, args.batch_size)
+
+    output = args.output or results_dir / f"benchmark-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+
+    print(results_table(results, baseline))
+    print(f"Benchmark results saved to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,65 @@
+import argparse
+import hashlib
+import json
 import os
+import re
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 from pathlib import Path
+from workbook_cache import pyarrow, workbook_hash, write_snapshot
+from validation import validation_error_columns, error_rows
+import instrumentation
+from instrumentation import span, timed, run_collected, collected_result
+
+# Directory processed population file snapshots are stored in
+cache_dir = Path('Processed_Data/Population_Cache')
+
+# Population files by format: per age group files (2013-2021) and combined files (2022)
+individual_files = ["Kids.csv", "Younger_Adults.csv", "Older_Adults.csv"]
+combined_files = ["Combined_Data.csv"]
+
+# Age brackets of the combined population files (2022), with the columns summed into each bracket
+combined_age_brackets = {
+    '0-4': ['UNDER5_TOT'],
+    '5-17': ['AGE513_TOT', 'AGE1417_TOT'],
+    '18-24': ['AGE1824_TOT'],
+    '25-34': ['AGE2529_TOT', 'AGE3034_TOT'],
+    '35-44': ['AGE3539_TOT', 'AGE4044_TOT'],
+    '45-54': ['AGE4549_TOT', 'AGE5054_TOT'],
+    '55-64': ['AGE5559_TOT', 'AGE6064_TOT'],
+    '65+': ['AGE65PLUS_TOT']
+}
+
+
+def count_errors(df, columns):
+    """
+    Finds the population counts that are missing or not integers.
 
+    Columns the reader already parsed as integers are valid as a whole; in other columns each
+    value is checked, with thousands separators removed from values left as text.
 
+    Args:
+        df (pandas.DataFrame): Population data as read from the file.
+        columns (list): Count column names.
+
+    Returns:
+        pandas.DataFrame: Validation error table (see validation.validation_error_columns), with the file line of each value.
+    """
+    errors = [pd.DataFrame(columns=validation_error_columns)]
+    for col in columns:
+        if pd.api.types.is_integer_dtype(df[col].dtype):
+            continue
+
+        values = df[col]
+        if not pd.api.types.is_numeric_dtype(values.dtype):
+            values = values.str.replace(",", "")
+        numbers = pd.to_numeric(values, errors="coerce")
+        errors.append(error_rows(df[col], numbers.isna() | (numbers % 1 != 0), col, "integer"))
+
+    return pd.concat(errors, ignore_index=True)
+
+
+@timed('process_file')
 def process_file(file_path, age_bracket_mapping):
     """
     Processes *individual* population data files (2013-2021) to create a DataFrame with relevant information.
@@ -14,11 +71,6 @@ def process_file(file_path, age_bracket_mapping):
     Returns:
         pandas.DataFrame: Processed DataFrame containing age bracket, county, year, and population data.
     """
-    df = pd.read_csv(file_path)
-
-    # Filter out summary row (County = "Michigan")
-    df = df[df["County"] != "Michigan"]
-
     # Select and rename columns
     if "Kids.csv" in file_path:
         age_col_indices = [0, 4, 6]
@@ -30,16 +82,22 @@ def process_file(file_path, age_bracket_mapping):
         age_col_indices = [0, 4, 6, 8, 10, 12]
         age_brackets = ["45-49", "50-54", "55-59", "60-64", "65+"]
 
-    df = df.iloc[:, age_col_indices]
+    # Only read the selected columns; thousands separators in counts such as "1,234" are parsed by the reader.
+    # Only empty cells are read as missing, so invalid counts such as "N/A" are reported as written
+    df = pd.read_csv(file_path, usecols=age_col_indices, thousands=",", dtype={0: "str"}, keep_default_na=False, na_values=[""])
     df.columns = ["County"] + age_brackets
 
-    # Convert Population_Total column to integers and handle missing values
-    for col in df.columns[1:]:
-        df[col] = df[col].str.replace(",", "")
-        try:
-            df[col] = df[col].astype(int)
-        except ValueError:
-            raise ValueError(f"Invalid value found in {col} column. Please check for null or non-integer values.")
+    # Filter out summary row (County = "Michigan")
+    df = df[df["County"] != "Michigan"]
+
+    # Report every missing or non-integer count at once
+    invalid_counts = count_errors(df, age_brackets)
+    if len(invalid_counts):
+        raise ValueError(f"Invalid population counts in {file_path}. Please check for null or non-integer values:\n"
+                         f"{invalid_counts.to_string(index=False)}")
+
+    # Convert Population_Total columns to integers
+    df = df.astype({col: "int64" for col in age_brackets})
 
     # Add the "Year" column
     year = os.path.basename(os.path.dirname(file_path))
@@ -67,13 +125,13 @@ def process_file(file_path, age_bracket_mapping):
     return df_grouped
 
 
+@timed('process_combined_file')
 def process_combined_file(file_path):
     """
     Processes *combined* population data files (2022) to create a DataFrame with relevant information.
 
     Args:
         file_path (str): Path to the data file.
-        age_bracket_mapping (dict): Mapping of age brackets to desired age brackets.
 
     Returns:
         pandas.DataFrame: Processed DataFrame containing age bracket, county, year, and population data.
@@ -81,67 +139,111 @@ def process_combined_file(file_path):
     # Read the original CSV file
     df = pd.read_csv(file_path)
 
-    # Create a list to store the processed data
-    processed_data = []
-
-    # Define age brackets
-    age_brackets = {
-        '0-4': ['UNDER5_TOT'],
-        '5-17': ['AGE513_TOT', 'AGE1417_TOT'],
-        '18-24': ['AGE1824_TOT'],
-        '25-34': ['AGE2529_TOT', 'AGE3034_TOT'],
-        '35-44': ['AGE3539_TOT', 'AGE4044_TOT'],
-        '45-54': ['AGE4549_TOT', 'AGE5054_TOT'],
-        '55-64': ['AGE5559_TOT', 'AGE6064_TOT'],
-        '65+': ['AGE65PLUS_TOT']
-    }
-
     # Filter data for the year "4" (the format of this population file lists 2022 data as year "4")
     filtered_df = df[df['YEAR'] == 4]
 
+    # Sum each age bracket's source columns as whole columns, one bracket column per county row
+    brackets = pd.DataFrame(
+        {age_bracket: filtered_df[columns].sum(axis=1, min_count=len(columns)) for age_bracket, columns in combined_age_brackets.items()}
+    )
+    brackets.insert(0, 'County', filtered_df['CTYNAME'])
+
+    # Reshape to one row per county and age bracket. melt lists the rows bracket by bracket and keeps
+    # brackets missing a source column as NaN; the stable sort on the row labels puts each county's
+    # brackets back together, in county order
+    processed_df = brackets.melt(id_vars='County', var_name='Age_Bracket', value_name='Population_Total', ignore_index=False)
+    processed_df = processed_df.sort_index(kind='stable').reset_index(drop=True)
+
     # Change the year to "2022"
-    year = 2022
+    processed_df.insert(1, 'Year', 2022)
 
-    # Iterate over rows in the filtered DataFrame
-    for index, row in filtered_df.iterrows():
-        county = row['CTYNAME']
+    return processed_df
 
-        # Iterate over age brackets and calculate total population
-        for age_bracket, columns in age_brackets.items():
-            total_population = sum(row[column] for column in columns)
 
-            # Append the data to the list
-            processed_data.append([county, year, age_bracket, total_population])
+def snapshot_path(file_path, age_bracket_mapping, cache_dir=cache_dir):
+    """
+    Returns the snapshot path of a processed population file.
 
-    # Create a new DataFrame from the list
-    processed_df = pd.DataFrame(processed_data, columns=['County', 'Year', 'Age_Bracket', 'Population_Total'])
+    Snapshots are keyed by the file's content hash, this script's source and the age bracket
+    mapping, so editing either the file or the processing invalidates them.
 
-    return processed_df
+    Args:
+        file_path (str): Path to the data file.
+        age_bracket_mapping (dict): Mapping of age brackets to desired age brackets.
+        cache_dir (Path): Snapshot directory.
+
+    Returns:
+        Path: Parquet snapshot path.
+    """
+    key = hashlib.sha256()
+    key.update(workbook_hash(file_path).encode())
+    key.update(Path(__file__).read_bytes())
+    key.update(json.dumps(age_bracket_mapping, sort_keys=True).encode())
+
+    # e.g. Raw_Data/Population_Data/2013/Kids.csv -> 2013_Kids-<hash>.parquet
+    prefix = re.sub(r'[^0-9A-Za-z]+', '_', f"{Path(file_path).parent.name}-{Path(file_path).stem}")
+    return Path(cache_dir) / f"{prefix}-{key.hexdigest()[:16]}.parquet"
+
+
+def process_population_file(file_path, age_bracket_mapping, use_cache=True, cache_dir=cache_dir):
+    """
+    Processes an individual or combined population data file, reusing an earlier result while the file is unchanged.
+
+    Args:
+        file_path (str): Path to the data file.
+        age_bracket_mapping (dict): Mapping of age brackets to desired age brackets.
+        use_cache (bool): Whether processed files are read from and written to Parquet snapshots.
+        cache_dir (Path): Snapshot directory.
 
+    Returns:
+        pandas.DataFrame: Processed DataFrame containing age bracket, county, year, and population data.
+    """
+    cached = use_cache and pyarrow is not None
+    if cached:
+        path = snapshot_path(file_path, age_bracket_mapping, cache_dir)
+        if path.exists():
+            return pd.read_parquet(path)
+
+    if os.path.basename(file_path) in combined_files:
+        df = process_combined_file(file_path)
+    else:
+        df = process_file(file_path, age_bracket_mapping)
 
-def process_directory(data_dir, age_bracket_mapping):
+    if cached:
+        write_snapshot(df, path)
+    return df
+
+
+@timed('process_directory')
+def process_directory(data_dir, age_bracket_mapping, workers=1, use_cache=True):
     """
     Process a directory of data files to create a final combined DataFrame.
 
+    Files are processed independently, so with workers > 1 they are fanned out to a
+    ProcessPoolExecutor; the combined DataFrame keeps the order in which the files are found.
+    Unchanged files are read from their Parquet snapshots, so after adding a year only the new
+    files are processed.
+
     Args:
         data_dir (str): Path to the directory containing data files.
         age_bracket_mapping (dict): Mapping of age brackets to desired age brackets.
+        workers (int): Number of worker processes; 1 processes the files sequentially and 0 uses one worker per CPU.
+        use_cache (bool): Whether processed files are reused from Parquet snapshots.
 
     Returns:
         pandas.DataFrame: Combined DataFrame containing processed data.
     """
-    processed_dfs = []
-
-    for root, dirs, files in os.walk(data_dir):
-        for file in files:
-            if file in ["Kids.csv", "Younger_Adults.csv", "Older_Adults.csv"]:
-                file_path = os.path.join(root, file)
-                df_processed = process_file(file_path, age_bracket_mapping)
-                processed_dfs.append(df_processed)
-            elif file in ["Combined_Data.csv"]:
-                file_path = os.path.join(root, file)
-                df_processed = process_combined_file(file_path)
-                processed_dfs.append(df_processed)
+    file_paths = [os.path.join(root, file) for root, dirs, files in os.walk(data_dir)
+                  for file in files if file in individual_files + combined_files]
+
+    if workers == 1 or len(file_paths) <= 1:
+        processed_dfs = [process_population_file(file_path, age_bracket_mapping, use_cache) for file_path in file_paths]
+    else:
+        # Workers send the spans they record back with their results (see instrumentation.run_collected)
+        with ProcessPoolExecutor(max_workers=workers or None) as executor:
+            futures = [executor.submit(run_collected, instrumentation.enabled, process_population_file, file_path, age_bracket_mapping, use_cache)
+                       for file_path in file_paths]
+            processed_dfs = [collected_result(future) for future in futures]
 
     final_df = pd.concat(processed_dfs, ignore_index=True)
     return final_df
@@ -150,6 +252,9 @@ def process_directory(data_dir, age_bracket_mapping):
 # Path to Raw_Data directory
 data_dir = Path("Raw_Data/Population_Data")
 
+# Path the combined population data is written to
+output_path = Path("Processed_Data/Population_Data")
+
 # Define age brackets mapping
 age_bracket_mapping = {
     "<1": "0-4",
@@ -170,8 +275,29 @@ age_bracket_mapping = {
     "65+": "65+"
 }
 
-# Process the directory and get the final dataframe
-final_df = process_directory(data_dir, age_bracket_mapping)
 
-# Save the final dataframe as a CSV file
-final_df.to_csv(Path("Processed_Data/Population_Data"), index=False)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Combine the population data files into Processed_Data/Population_Data.')
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help='Number of worker processes, 0 for one per CPU (default: %(default)s)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Process every file instead of reusing Parquet snapshots of earlier runs')
+    args = parser.parse_args(argv)
+
+    if args.workers < 0:
+        parser.error('--workers must be 0 or greater')
+
+    # Process the directory and get the final dataframe
+    final_df = process_directory(data_dir, age_bracket_mapping, args.workers, not args.no_cache)
+
+    # Save the final dataframe as a CSV file
+    with span('write') as stage:
+        final_df.to_csv(output_path, index=False)
+        stage.rows = len(final_df)
+
+    # Save the per-stage timings when run with CS_PROFILE=<report.json>
+    instrumentation.save_report()
+
+
+if __name__ == '__main__':
+    main()
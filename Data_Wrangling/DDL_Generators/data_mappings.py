@@ -2420,4 +2420,23 @@ drug_rescheduling_mapping = {
     'HYDROCODONE HOMATROPINE 5-1.5 MG/5 ML ORAL LIQUID': 2,
     'HYDROCODONE-ACETAMINOPHEN 10-325 MG TABLET': 2,
     'HYDROCODONE-HOMATROPINE 5-1.5 MG TABLET': 2
-}
\ No newline at end of file
+}
+
+# Abbreviations expanded when drug names are compared by normalized key (see drug_names.py)
+drug_name_abbreviations = {
+    'APAP': 'ACETAMINOPHEN',
+    'CAFF': 'CAFFEINE',
+    'CAP': 'CAPSULE',
+    'CAPS': 'CAPSULE',
+    'COD': 'CODEINE',
+    'DEXTROAMP': 'DEXTROAMPHETAMINE',
+    'INJ': 'INJECTION',
+    'LIQ': 'LIQUID',
+    'PCKT': 'PACKET',
+    'PKT': 'PACKET',
+    'SOLN': 'SOLUTION',
+    'SULF': 'SULFATE',
+    'SUSP': 'SUSPENSION',
+    'TAB': 'TABLET',
+    'TABS': 'TABLET'
+}
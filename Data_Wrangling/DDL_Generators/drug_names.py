@@ -0,0 +1,85 @@
+import re
+from mapping_store import mapping
+
+# Thousands separators inside numbers, e.g. '1,000 MG'
+_thousands_separator = re.compile(r'(?<=\d),(?=\d{3}\b)')
+
+# Punctuation that separates words in drug names; periods are kept inside numbers ('7.5') and
+# '#' and '%' are kept as they are part of strengths ('#3', '1.62%')
+_separators = re.compile(r'[^0-9A-Z.#%]+|\.(?!\d)|(?<!\d)\.')
+
+
+def name_key(name, abbreviations=None):
+    """
+    Folds a drug name into a normalized key for matching near-identical spellings.
+
+    The name is upper-cased, punctuation is treated as whitespace, runs of whitespace are
+    collapsed and abbreviations such as COD, SOLN and PCKT are expanded
+    (see data_mappings.drug_name_abbreviations).
+
+    Args:
+        name (str): Drug name.
+        abbreviations (dict): Abbreviation -> expansion, defaults to the compiled drug_name_abbreviations.
+
+    Returns:
+        str: Normalized key, e.g. 'ACETAMINOPHEN CODEINE #3 TABLET' for 'ACETAMINOPHEN/COD #3 TAB'.
+    """
+    if abbreviations is None:
+        abbreviations = mapping('drug_name_abbreviations')
+
+    words = _separators.sub(' ', _thousands_separator.sub('', str(name).upper())).split()
+    return ' '.join(abbreviations.get(word, word) for word in words)
+
+
+def build_key_index(drug_name_mapping, abbreviations):
+    """
+    Builds the normalized-key index of drug_name_mapping.
+
+    Both the raw names and the standardized names are indexed, a standardized name resolving to
+    itself. Keys shared by names that standardize differently are ambiguous and left out, so such
+    names are only matched exactly.
+
+    Args:
+        drug_name_mapping (dict): Raw drug name -> standardized drug name.
+        abbreviations (dict): Abbreviation -> expansion.
+
+    Returns:
+        dict: Normalized key -> standardized drug name.
+    """
+    candidates = {}
+    for raw_name, standardized_name in list(drug_name_mapping.items()) + [(name, name) for name in drug_name_mapping.values()]:
+        candidates.setdefault(name_key(raw_name, abbreviations), set()).add(standardized_name)
+
+    return {key: names.pop() for key, names in candidates.items() if len(names) == 1}
+
+
+def canonical_name(name):
+    """
+    Standardizes a single drug name.
+
+    Exact drug_name_mapping entries take precedence; other names are looked up by normalized key
+    and names that match neither are kept as they are.
+
+    Args:
+        name (str): Drug name.
+
+    Returns:
+        str: Standardized drug name.
+    """
+    standardized_name = mapping('drug_name_mapping').get(name)
+    if standardized_name is not None:
+        return standardized_name
+    return mapping('drug_name_keys').get(name_key(name), name)
+
+
+def canonical_names(names):
+    """
+    Standardizes distinct drug names, e.g. the uniques of a factorized column.
+
+    Args:
+        names (iterable): Distinct drug names.
+
+    Returns:
+        list: Standardized drug names, in the order of names.
+    """
+    return [canonical_name(name) for name in names]
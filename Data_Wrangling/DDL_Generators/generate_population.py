@@ -1,12 +1,18 @@
-import csv
+import argparse
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from sql_writer import sql_literals, tsv_fields, join_literals, insert_prefix, write_table, write_load_data, add_output_arguments
+import instrumentation
 
-# Read CSV file and extract column names and data rows
+# Processed CSV file with County, Year, Age_Bracket and Population_Total columns
 csv_filename = 'Processed_Data/Population_Data'
 
-with open(csv_filename, 'r') as csv_file:
-    csv_reader = csv.reader(csv_file)
-    columns = next(csv_reader)
-    data_rows = list(csv_reader)
+# Directory the ALL_Population files are written to
+output_dir = Path('Data_Wrangling/Raw_SQL_Files')
+
+# Number of processed rows read and rendered at a time, bounding the memory held by rendered rows
+render_chunk_rows = 100000
 
 # Generate DDL script
 table_name = 'Population'
@@ -17,7 +23,13 @@ ddl_script += "    County VARCHAR(25) NOT NULL,\n"
 ddl_script += "    Population_Year YEAR NOT NULL,\n"
 ddl_script += "    Age_Bracket VARCHAR(25) NOT NULL,\n"
 ddl_script += "    Population_Total INT NOT NULL\n"
-ddl_script += ");"
+ddl_script += ");\n"
+
+# Population table columns, in the order of the processed CSV file's columns
+population_columns = ['County', 'Population_Year', 'Age_Bracket', 'Population_Total']
+
+# Value kind each column is rendered as in INSERT statements (see sql_writer.sql_literals)
+population_kinds = ['text', 'text', 'text', 'int']
 
 # Restructure age brackets strings to maintain consitency with prescription data
 age_mapping = {
@@ -31,23 +43,93 @@ age_mapping = {
     '65+': 'Ages 65 and older'
 }
 
-# Generate INSERT statements for data with age remapping
-insert_statements = []
-for row in data_rows:
-    age_bracket = row[columns.index('Age_Bracket')]  # Get the age bracket from the row
-    remapped_age = age_mapping.get(age_bracket, age_bracket)  # Use the mapping, or keep original if not found
-    row[columns.index('Age_Bracket')] = remapped_age  # Update the age bracket in the row
 
-    values = ", ".join([f"'{value}'" if column != "Population_Year" and column != "Population_Total" else value for column, value in zip(columns, row)])
-    insert_statement = f"INSERT INTO {table_name} (County, Population_Year, Age_Bracket, Population_Total) VALUES ({values});"
-    insert_statements.append(insert_statement)
+def remapped_chunks(csv_filename=csv_filename):
+    """
+    Reads the processed CSV file in chunks of render_chunk_rows rows, remapping the age brackets.
+
+    Values are kept as the text found in the file. Age brackets are remapped once per distinct
+    bracket; brackets missing from age_mapping are kept as they are.
+
+    Args:
+        csv_filename (str): Processed CSV file.
+
+    Yields:
+        pandas.DataFrame: Consecutive chunks of remapped rows.
+    """
+    with pd.read_csv(csv_filename, dtype=str, keep_default_na=False, chunksize=render_chunk_rows) as chunks:
+        for chunk in chunks:
+            codes, brackets = pd.factorize(chunk['Age_Bracket'])
+            chunk['Age_Bracket'] = np.array([age_mapping.get(bracket, bracket) for bracket in brackets], dtype=object)[codes]
+            yield chunk
+
+
+def insert_values(chunks):
+    """
+    Renders the INSERT value tuple of every remapped row, column-wise per chunk.
+
+    Args:
+        chunks (iterable): Chunks returned by remapped_chunks.
+
+    Yields:
+        str: Value tuples, e.g. "('Kent County', '2013', 'Ages 4 and younger', 16000)".
+    """
+    for chunk in chunks:
+        literals = [sql_literals(chunk[column], kind) for column, kind in zip(chunk.columns, population_kinds)]
+        yield from join_literals(literals, ', ', '(', ')')
+
+
+def load_data_rows(chunks):
+    """
+    Renders the tab-separated LOAD DATA line of every remapped row, column-wise per chunk.
+
+    Args:
+        chunks (iterable): Chunks returned by remapped_chunks.
+
+    Yields:
+        str: LOAD DATA lines, without line terminators.
+    """
+    for chunk in chunks:
+        yield from join_literals([tsv_fields(chunk[column], 'text') for column in chunk.columns], '\t')
+
+
+def write_population(output_dir=output_dir, batch_size=1, load_data=False, compression=None):
+    """
+    Streams the DDL and INSERT statements for the processed population data to ALL_Population.SQL.
+
+    With load_data the rows are also written to ALL_Population.tsv, together with
+    ALL_Population_Load_Data.SQL holding the DDL and the LOAD DATA LOCAL INFILE statement for that
+    file (see sql_writer.write_table and sql_writer.write_load_data).
+
+    Args:
+        output_dir (Path): Directory the SQL files are written to.
+        batch_size (int): Maximum number of rows per INSERT statement.
+        load_data (bool): Whether a LOAD DATA file and statement are written as well.
+        compression (str): None, 'gzip' or 'zstd'.
+
+    Returns:
+        Path: Path of the written SQL file.
+    """
+    sql_filename = write_table(Path(output_dir) / 'ALL_Population.SQL', ddl_script, insert_prefix(table_name, population_columns),
+                               insert_values(remapped_chunks()), batch_size, compression)
+
+    if load_data:
+        write_load_data(Path(output_dir) / 'ALL_Population.tsv', ddl_script, table_name, population_columns,
+                        load_data_rows(remapped_chunks()), compression)
+
+    return sql_filename
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate ALL_Population.SQL from the processed population data.')
+    add_output_arguments(parser, 'ALL_Population.tsv')
+    args = parser.parse_args(argv)
+
+    write_population(output_dir, args.batch_size, args.load_data, args.compression)
 
-# Write DDL and INSERT scripts to file
-sql_filename = 'Data_Wrangling/Raw_SQL_Files/ALL_Population.SQL'
+    # Save the per-stage timings when run with CS_PROFILE=<report.json>
+    instrumentation.save_report()
 
-with open(sql_filename, 'w') as sql_file:
-    sql_file.write(ddl_script + '\n\n')
-    for insert_statement in insert_statements:
-        sql_file.write(insert_statement + '\n')
 
-    print(f"SQL script written to {sql_filename}")
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,229 @@
+# Lightweight per-stage timing and memory instrumentation.
+#
+# Stages are wrapped in spans, either with "with span('normalize') as s: ...; s.rows = len(data)"
+# or with the @timed decorator. While instrumentation is disabled span() returns a shared no-op
+# object and @timed calls straight through, so the spans can stay in production runs. Enable it
+# with enable(path) (e.g. generate_CS.py --profile) or by setting the CS_PROFILE environment
+# variable to the path of the JSON report.
+import functools
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # not available on Windows, peak RSS is not recorded there
+    resource = None
+
+enabled = bool(os.environ.get('CS_PROFILE'))
+
+# Path the JSON report is saved to by save_report
+report_path = os.environ.get('CS_PROFILE') or None
+
+# Finished spans of this process, in the order they finished
+spans = []
+
+# Labels of the enclosing spans, inherited by nested spans
+_label_stack = [{}]
+
+
+def enable(path=None):
+    """
+    Turns instrumentation on for the rest of the process.
+
+    Args:
+        path (Path): Path the JSON report is saved to by save_report.
+    """
+    global enabled, report_path
+    enabled = True
+    if path is not None:
+        report_path = path
+
+
+def peak_rss_mb():
+    """
+    Returns the peak resident set size of the current process.
+
+    Returns:
+        float: Peak RSS in MiB, or None where the resource module is unavailable.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in KiB elsewhere
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / (1 << 10)
+
+
+class Span:
+    """
+    Records the wall time, CPU time, peak RSS and row count of a with block.
+    """
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+        self.rows = None
+
+    def __enter__(self):
+        self.labels = {**_label_stack[-1], **self.labels}
+        _label_stack.append(self.labels)
+        self.started = time.time()
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        wall = time.perf_counter() - self.start_wall
+        cpu = time.process_time() - self.start_cpu
+        _label_stack.pop()
+        spans.append({
+            'name': self.name,
+            'labels': self.labels,
+            'depth': len(_label_stack) - 1,
+            'started': self.started,
+            'wall_seconds': wall,
+            'cpu_seconds': cpu,
+            'peak_rss_mb': peak_rss_mb(),
+            'rows': self.rows,
+            'pid': os.getpid(),
+            'failed': exc_type is not None
+        })
+        return False
+
+
+class _NullSpan:
+    """
+    Span returned while instrumentation is disabled; assigning rows is accepted and ignored.
+    """
+
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_null_span = _NullSpan()
+
+
+def span(name, **labels):
+    """
+    Creates a span for a with block.
+
+    Args:
+        name (str): Stage name, e.g. 'normalize'.
+        **labels: Labels recorded with this span and every span nested in it, e.g. year=2013.
+
+    Returns:
+        Span: Span to use in a with statement; set its rows attribute to record a row count.
+    """
+    if not enabled:
+        return _null_span
+    return Span(name, labels)
+
+
+def timed(name):
+    """
+    Decorator recording a span for every call of a function.
+
+    The row count is taken from the return value when it is a DataFrame or Series.
+
+    Args:
+        name (str): Stage name.
+
+    Returns:
+        callable: Decorator.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return function(*args, **kwargs)
+            with Span(name, {}) as timed_span:
+                result = function(*args, **kwargs)
+                if hasattr(result, 'shape'):
+                    timed_span.rows = len(result)
+            return result
+        return wrapper
+    return decorator
+
+
+def run_collected(collect, function, *args):
+    """
+    Runs a function in a worker process and returns the spans it recorded alongside its result.
+
+    Args:
+        collect (bool): Whether instrumentation is enabled in the worker (the parent's enabled flag).
+        function (callable): Function to run.
+        *args: Arguments passed to function.
+
+    Returns:
+        tuple: (function result, list of span records).
+    """
+    global enabled
+    enabled = collect
+    del spans[:]
+    result = function(*args)
+    return result, list(spans)
+
+
+def collected_result(future):
+    """
+    Returns the result of a run_collected future, adding the spans the worker recorded to this process's spans.
+
+    Args:
+        future (concurrent.futures.Future): Future of a run_collected call.
+
+    Returns:
+        Result of the function run by the worker.
+    """
+    result, records = future.result()
+    spans.extend(records)
+    return result
+
+
+def report_table(records=None):
+    """
+    Formats span records as a plain-text table, nested spans indented below their parents.
+
+    Args:
+        records (list): Span records, defaults to the spans of this process.
+
+    Returns:
+        str: Table with one line per span.
+    """
+    records = sorted(spans if records is None else records, key=lambda record: (record['pid'], record['started'], record['depth']))
+
+    lines = [f"{'Span':<32}{'Wall s':>10}{'CPU s':>10}{'Peak RSS MiB':>14}{'Rows':>12}"]
+    for record in records:
+        labels = ' '.join(f"{key}={value}" for key, value in record['labels'].items())
+        name = '  ' * record['depth'] + record['name'] + (f" [{labels}]" if labels and record['depth'] == 0 else '')
+        peak = f"{record['peak_rss_mb']:.0f}" if record['peak_rss_mb'] is not None else '-'
+        rows = f"{record['rows']:,}" if record['rows'] is not None else '-'
+        lines.append(f"{name:<32}{record['wall_seconds']:>10.3f}{record['cpu_seconds']:>10.3f}{peak:>14}{rows:>12}")
+
+    return '\n'.join(lines)
+
+
+def save_report(path=None, records=None):
+    """
+    Saves span records as a JSON report and prints them as a table, if instrumentation is enabled.
+
+    Args:
+        path (Path): Report path, defaults to the path given to enable or CS_PROFILE.
+        records (list): Span records, defaults to the spans of this process.
+    """
+    path = path or report_path
+    if not enabled or path is None:
+        return
+
+    records = spans if records is None else records
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    Path(path).write_text(json.dumps({'spans': records}, indent=2, default=str))
+
+    print(report_table(records))
+    print(f"Instrumentation report saved to {path}")
@@ -0,0 +1,314 @@
+# Compiled, memory-mapped form of the dicts in data_mappings.py.
+#
+# data_mappings.py holds a few thousand lines of dict literals that every generator process
+# evaluates on import. The first run compiles them into a single binary artifact: each mapping
+# becomes an array-backed string table with an open-addressing hash index. Later runs and every
+# worker process memory-map that file read-only, so loading takes microseconds and the pages
+# are shared between processes instead of each one rebuilding (or unpickling) the dicts. The
+# artifact is keyed by the content hash of data_mappings.py and drug_names.py and recompiled
+# when either changes.
+import hashlib
+import json
+import os
+import numpy as np
+from pathlib import Path
+
+# Directory compiled mapping artifacts are stored in
+artifact_dir = Path('Processed_Data/Mapping_Cache')
+
+# Source files the artifact is compiled from
+source_files = [Path(__file__).with_name('data_mappings.py'), Path(__file__).with_name('drug_names.py')]
+
+# Mappings compiled into the artifact, with the kind of their values
+mapping_kinds = {
+    'drug_name_mapping': 'str',
+    'drug_name_abbreviations': 'str',
+    'drug_name_keys': 'str',  # normalized key index built by drug_names.build_key_index
+    'state_mapping': 'str',
+    'cs_component_mapping': 'str',
+    'drug_rescheduling_mapping': 'int'
+}
+
+_magic = b'CSMAP001'
+
+# Tables loaded by this process, see mapping()
+_tables = None
+
+
+def key_hash(key_bytes):
+    """
+    Returns the stable 64-bit hash used by the artifact's hash indexes.
+
+    Python's built-in hash() is randomized per process, so a fixed digest is used instead.
+
+    Args:
+        key_bytes (bytes): UTF-8 encoded key.
+
+    Returns:
+        int: Hash value.
+    """
+    return int.from_bytes(hashlib.blake2b(key_bytes, digest_size=8).digest(), 'little')
+
+
+def string_table(strings):
+    """
+    Packs strings into a byte array and an offsets array.
+
+    Args:
+        strings (list): Strings to pack.
+
+    Returns:
+        tuple: (uint8 array of concatenated UTF-8 bytes, int64 array of len(strings) + 1 offsets).
+    """
+    encoded = [string.encode() for string in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(string) for string in encoded])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def hash_index(keys):
+    """
+    Builds an open-addressing (linear probing) hash index over encoded keys.
+
+    Args:
+        keys (list): UTF-8 encoded keys.
+
+    Returns:
+        numpy.ndarray: int32 slots holding key positions, -1 for empty slots; the length is a power of two.
+    """
+    size = 1 << max(3, (2 * len(keys) - 1).bit_length())
+    slots = np.full(size, -1, dtype=np.int32)
+
+    for position, key in enumerate(keys):
+        slot = key_hash(key) & (size - 1)
+        while slots[slot] != -1:
+            slot = (slot + 1) & (size - 1)
+        slots[slot] = position
+
+    return slots
+
+
+class MappingTable:
+    """
+    Read-only dict-like view of a compiled mapping, backed by (memory-mapped) arrays.
+    """
+
+    def __init__(self, kind, key_data, key_offsets, slots, values, value_offsets=None):
+        self.kind = kind
+        self.key_data = key_data
+        self.key_offsets = key_offsets
+        self.slots = slots
+        self.values = values
+        self.value_offsets = value_offsets
+        self.mask = len(slots) - 1
+
+    def __len__(self):
+        return len(self.key_offsets) - 1
+
+    def find(self, key):
+        """
+        Returns the position of a key in the table.
+
+        Args:
+            key (str): Key to look up.
+
+        Returns:
+            int: Key position, or -1 if the key is not in the table.
+        """
+        if not isinstance(key, str):
+            return -1
+
+        key_bytes = key.encode()
+        slot = key_hash(key_bytes) & self.mask
+        while True:
+            position = int(self.slots[slot])
+            if position == -1:
+                return -1
+            if self.key_data[self.key_offsets[position]:self.key_offsets[position + 1]].tobytes() == key_bytes:
+                return position
+            slot = (slot + 1) & self.mask
+
+    def value(self, position):
+        """
+        Returns the value stored at a key position.
+
+        Args:
+            position (int): Key position returned by find.
+
+        Returns:
+            str or int: Value.
+        """
+        if self.kind == 'int':
+            return int(self.values[position])
+        return self.values[self.value_offsets[position]:self.value_offsets[position + 1]].tobytes().decode()
+
+    def key(self, position):
+        return self.key_data[self.key_offsets[position]:self.key_offsets[position + 1]].tobytes().decode()
+
+    def get(self, key, default=None):
+        position = self.find(key)
+        return default if position == -1 else self.value(position)
+
+    def __contains__(self, key):
+        return self.find(key) != -1
+
+    def __getitem__(self, key):
+        position = self.find(key)
+        if position == -1:
+            raise KeyError(key)
+        return self.value(position)
+
+    def keys(self):
+        return [self.key(position) for position in range(len(self))]
+
+    def items(self):
+        return [(self.key(position), self.value(position)) for position in range(len(self))]
+
+
+def compile_arrays():
+    """
+    Compiles the mappings of data_mappings.py into named arrays and a header describing them.
+
+    Returns:
+        tuple: (header dict, dict of array name -> numpy.ndarray).
+    """
+    import data_mappings
+    from drug_names import build_key_index
+
+    sources = {name: getattr(data_mappings, name) for name in mapping_kinds if hasattr(data_mappings, name)}
+    sources['drug_name_keys'] = build_key_index(data_mappings.drug_name_mapping, data_mappings.drug_name_abbreviations)
+
+    header = {'tables': {}}
+    arrays = {}
+    for name, kind in mapping_kinds.items():
+        keys = list(sources[name])
+        arrays[f'{name}.key_data'], arrays[f'{name}.key_offsets'] = string_table(keys)
+        arrays[f'{name}.slots'] = hash_index([key.encode() for key in keys])
+        if kind == 'int':
+            arrays[f'{name}.values'] = np.array([sources[name][key] for key in keys], dtype=np.int64)
+        else:
+            arrays[f'{name}.values'], arrays[f'{name}.value_offsets'] = string_table([sources[name][key] for key in keys])
+        header['tables'][name] = kind
+
+    return header, arrays
+
+
+def write_artifact(path, header, arrays):
+    """
+    Writes compiled arrays to a single file: magic, header length, JSON header, then 8-byte aligned arrays.
+
+    Args:
+        path (Path): Artifact path.
+        header (dict): Header returned by compile_arrays.
+        arrays (dict): Arrays returned by compile_arrays.
+    """
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = [array.dtype.str, offset, len(array)]
+        offset += -(-array.nbytes // 8) * 8
+
+    header_bytes = json.dumps({**header, 'arrays': layout}).encode()
+    header_bytes += b' ' * (-len(header_bytes) % 8)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Write to a temporary file first so parallel workers never map a partial artifact
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(temp_path, 'wb') as artifact:
+        artifact.write(_magic)
+        artifact.write(len(header_bytes).to_bytes(8, 'little'))
+        artifact.write(header_bytes)
+        for array in arrays.values():
+            artifact.write(array.tobytes())
+            artifact.write(b'\0' * (-array.nbytes % 8))
+    os.replace(temp_path, path)
+
+    # Remove artifacts compiled from earlier versions of the mappings
+    for stale_path in path.parent.glob('data_mappings-*.bin'):
+        if stale_path != path:
+            stale_path.unlink(missing_ok=True)
+
+
+def read_artifact(path):
+    """
+    Memory-maps an artifact written by write_artifact.
+
+    Args:
+        path (Path): Artifact path.
+
+    Returns:
+        tuple: (header dict, dict of array name -> read-only numpy.ndarray views of the mapped file).
+    """
+    buffer = np.memmap(path, dtype=np.uint8, mode='r')
+    if buffer[:8].tobytes() != _magic:
+        raise ValueError(f"{path} is not a compiled mapping artifact")
+
+    header_length = int.from_bytes(buffer[8:16].tobytes(), 'little')
+    header = json.loads(buffer[16:16 + header_length].tobytes())
+    data_start = 16 + header_length
+
+    arrays = {name: np.frombuffer(buffer, dtype=np.dtype(dtype), count=count, offset=data_start + offset)
+              for name, (dtype, offset, count) in header['arrays'].items()}
+    return header, arrays
+
+
+def source_hash():
+    """
+    Returns the content hash of the files the artifact is compiled from.
+
+    Returns:
+        str: Hex digest.
+    """
+    digest = hashlib.sha256()
+    for source_file in source_files:
+        digest.update(source_file.read_bytes())
+    return digest.hexdigest()
+
+
+def load_mappings(artifact_dir=artifact_dir):
+    """
+    Loads the compiled mappings, compiling and storing the artifact first if it is missing or stale.
+
+    If the artifact cannot be written (e.g. a read-only checkout) the compiled arrays are used
+    from memory.
+
+    Args:
+        artifact_dir (Path): Artifact directory.
+
+    Returns:
+        dict: MappingTable per mapping name.
+    """
+    path = Path(artifact_dir) / f"data_mappings-{source_hash()[:16]}.bin"
+
+    if path.exists():
+        header, arrays = read_artifact(path)
+    else:
+        header, arrays = compile_arrays()
+        try:
+            write_artifact(path, header, arrays)
+            header, arrays = read_artifact(path)
+        except OSError:
+            pass
+
+    return {name: MappingTable(kind, arrays[f'{name}.key_data'], arrays[f'{name}.key_offsets'], arrays[f'{name}.slots'],
+                               arrays[f'{name}.values'], arrays.get(f'{name}.value_offsets'))
+            for name, kind in header['tables'].items()}
+
+
+def mapping(name):
+    """
+    Returns a compiled mapping, loading the artifact on first use.
+
+    Args:
+        name (str): Name of the mapping in data_mappings.py, or 'drug_name_keys'.
+
+    Returns:
+        MappingTable: Dict-like read-only mapping.
+    """
+    global _tables
+
+    if _tables is None:
+        _tables = load_mappings()
+
+    return _tables[name]
@@ -0,0 +1,222 @@
+# In-memory population lookup for per-capita prescription measures.
+#
+# The processed population data (see clean_population_data.py) is loaded into a dense array
+# indexed by county id x year x age bracket id. Attaching populations to a prescriptions frame
+# then maps each distinct county, year and bracket to its id once and gathers the populations
+# with integer indexing, instead of merging the frames on three string keys.
+import re
+import numpy as np
+import pandas as pd
+from generate_population import csv_filename, age_mapping
+
+# State the population data covers; rows of other states have no population
+population_state = 'Michigan'
+
+# Suffix some population files add to county names, e.g. 'Kent County'
+_county_suffix = re.compile(r'\s+county$', re.IGNORECASE)
+
+
+def county_key(name):
+    """
+    Normalizes a county name for matching population and prescription data.
+
+    Args:
+        name (str): County name, e.g. 'Kent County', 'KENT' or 'Kent'.
+
+    Returns:
+        str: Normalized name, e.g. 'Kent'.
+    """
+    return _county_suffix.sub('', str(name).strip()).title()
+
+
+def lookup_ids(values, ids):
+    """
+    Maps a column to integer ids, looking up each distinct value once.
+
+    Args:
+        values (pandas.Series): Column to map.
+        ids (callable): Takes a distinct value and returns its id, or -1 if it has none.
+
+    Returns:
+        numpy.ndarray: int64 id per row, -1 for missing or unknown values.
+    """
+    codes, uniques = pd.factorize(values)
+    return np.append(np.array([ids(value) for value in uniques], dtype=np.int64), -1)[codes]
+
+
+class PopulationIndex:
+    """
+    Dense county x year x age bracket population array with lookups by name.
+    """
+
+    def __init__(self, counties, years, brackets, totals):
+        """
+        Args:
+            counties (list): County names, in the order of the array's first axis.
+            years (list): Consecutive years, in the order of the second axis.
+            brackets (list): Age brackets (prescription data form, e.g. 'Ages 18 To 24'), in the order of the third axis.
+            totals (numpy.ndarray): float64 populations, NaN where the population is unknown.
+        """
+        self.counties = list(counties)
+        self.years = list(years)
+        self.brackets = list(brackets)
+        self.totals = totals
+
+        # Populations of every age bracket combined, summed over the brackets that are known; the
+        # population files of 2013-2021 have no 5-17 bracket, so their totals are partial
+        known = ~np.isnan(totals)
+        self.all_ages = np.where(known.any(axis=2), np.nansum(totals, axis=2), np.nan)
+        self.partial_all_ages = known.any(axis=2) & ~known.all(axis=2)
+
+        self.county_ids = {county_key(county): county_id for county_id, county in enumerate(self.counties)}
+        self.bracket_ids = {bracket: bracket_id for bracket_id, bracket in enumerate(self.brackets)}
+
+    @classmethod
+    def from_frame(cls, data):
+        """
+        Builds the index from processed population rows.
+
+        Args:
+            data (pandas.DataFrame): County, Year, Age_Bracket and Population_Total columns, as written
+                by clean_population_data.py; age brackets are remapped with generate_population.age_mapping.
+
+        Returns:
+            PopulationIndex: Population index.
+        """
+        county_codes, counties = pd.factorize(data['County'].map(county_key))
+        bracket_codes, brackets = pd.factorize(data['Age_Bracket'].map(lambda bracket: age_mapping.get(bracket, bracket)))
+        years = data['Year'].astype(int).to_numpy()
+        first_year = years.min() if len(years) else 0
+
+        index = (county_codes, years - first_year, bracket_codes)
+        totals = np.zeros((len(counties), years.max() - first_year + 1 if len(years) else 0, len(brackets)))
+
+        # Rows repeating a county, year and bracket are summed, like the Population table rows would be
+        np.add.at(totals, index, data['Population_Total'].to_numpy(dtype=float))
+        present = np.zeros(totals.shape, dtype=bool)
+        present[index] = True
+        totals[~present] = np.nan
+
+        return cls(counties, range(first_year, first_year + totals.shape[1]), brackets, totals)
+
+    def county_id(self, county):
+        return self.county_ids.get(county_key(county), -1) if pd.notna(county) else -1
+
+    def year_id(self, year):
+        if pd.isna(year) or not self.years:
+            return -1
+        year_id = int(year) - self.years[0]
+        return year_id if 0 <= year_id < len(self.years) else -1
+
+    def bracket_id(self, bracket):
+        return self.bracket_ids.get(bracket, -1)
+
+    def lookup_index(self, counties, years, brackets=None, states=None):
+        """
+        Maps every row to its position in totals, or in all_ages without brackets.
+
+        Args:
+            counties (pandas.Series): County names.
+            years (pandas.Series): Years.
+            brackets (pandas.Series): Age brackets; None for the population of every age combined.
+            states (pandas.Series): States; rows outside population_state get no population.
+
+        Returns:
+            tuple: (boolean array of the rows with a position, tuple of int64 id arrays indexing totals or all_ages).
+        """
+        county_ids = lookup_ids(counties, self.county_id)
+        year_ids = lookup_ids(years, self.year_id)
+        known = (county_ids >= 0) & (year_ids >= 0)
+
+        if brackets is None:
+            index = (county_ids, year_ids)
+        else:
+            bracket_ids = lookup_ids(brackets, self.bracket_id)
+            known &= bracket_ids >= 0
+            index = (county_ids, year_ids, bracket_ids)
+
+        if states is not None:
+            known &= lookup_ids(states, lambda state: 0 if state == population_state else -1) >= 0
+
+        return known, index
+
+    def populations(self, counties, years, brackets=None, states=None):
+        """
+        Gathers the population of every row.
+
+        Without brackets the population of every age combined is gathered, which is partial for
+        years missing an age bracket (see partial_all_ages).
+
+        Args:
+            counties (pandas.Series): County names.
+            years (pandas.Series): Years.
+            brackets (pandas.Series): Age brackets; None for the population of every age combined.
+            states (pandas.Series): States; rows outside population_state get no population.
+
+        Returns:
+            numpy.ndarray: float64 population per row, NaN where it is unknown.
+        """
+        known, index = self.lookup_index(counties, years, brackets, states)
+        totals = self.all_ages if brackets is None else self.totals
+
+        populations = np.full(len(known), np.nan)
+        populations[known] = totals[tuple(ids[known] for ids in index)]
+        return populations
+
+    def attach_rates(self, data, measures=('Total_Prescriptions',), per=1000, county_column='PATIENT COUNTY',
+                     year_column='Prescription_Year', bracket_column='Patient_Age_Bracket', state_column='PATIENT STATE'):
+        """
+        Adds the population and per-capita rates of a prescriptions frame's rows.
+
+        Rows without an age bracket column (the 2013-2017 reports) use the population of every age.
+        That population only sums the brackets the population files have for the year, so such rows
+        are flagged in a Population_Partial column when a bracket is missing, e.g. 5-17 before 2022.
+
+        Args:
+            data (pandas.DataFrame): Transformed prescription rows.
+            measures (iterable): Count columns to compute rates for.
+            per (int): Number of residents the rates are expressed per.
+            county_column (str): County column.
+            year_column (str): Year column.
+            bracket_column (str): Age bracket column, used when present in data.
+            state_column (str): State column, used when present in data.
+
+        Returns:
+            pandas.DataFrame: Copy of data with Population_Total and Population_Partial columns and a
+            <measure>_Per_<per> column per measure.
+        """
+        brackets = data[bracket_column] if bracket_column in data else None
+        known, index = self.lookup_index(data[county_column], data[year_column], brackets,
+                                         data[state_column] if state_column in data else None)
+        positions = tuple(ids[known] for ids in index)
+
+        populations = np.full(len(data), np.nan)
+        partial = np.zeros(len(data), dtype=bool)
+        if brackets is None:
+            populations[known] = self.all_ages[positions]
+            partial[known] = self.partial_all_ages[positions]
+        else:
+            populations[known] = self.totals[positions]
+
+        data = data.copy()
+        data['Population_Total'] = populations
+        data['Population_Partial'] = partial
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for measure in measures:
+                rates = pd.to_numeric(data[measure], errors='coerce').to_numpy(dtype=float, na_value=np.nan) * per / populations
+                data[f"{measure}_Per_{per}"] = np.where(populations > 0, rates, np.nan)
+
+        return data
+
+
+def load_population_index(csv_filename=csv_filename):
+    """
+    Builds the population index from the processed population CSV file.
+
+    Args:
+        csv_filename (str): CSV file written by clean_population_data.py.
+
+    Returns:
+        PopulationIndex: Population index.
+    """
+    return PopulationIndex.from_frame(pd.read_csv(csv_filename))
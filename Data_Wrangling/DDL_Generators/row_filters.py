@@ -0,0 +1,150 @@
+# Row filters of a year build, e.g. {'AHFS DESCRIPTION': ['OPIATE AGONISTS'], 'DEA_Drug_Schedule': [2]}.
+#
+# Filters name transformed columns and values (see year_layouts.py), but are pushed down to
+# the rows as parsed, so normalization, validation and conversion only touch rows that can be
+# written. The pushed-down filter is evaluated on the distinct raw values of each column after
+# applying the same normalization as generate_CS.normalize. Schedules are matched before
+# rescheduling, so rows of rescheduled drugs are always kept there; the exact filter is applied
+# again to the transformed rows by apply_filters.
+import numpy as np
+import pandas as pd
+from mapping_store import mapping
+from drug_names import canonical_name
+from validation import schedule_digits
+
+
+def normalized_values(values, column, layout):
+    """
+    Normalizes raw values of a column the way generate_CS.normalize does.
+
+    Args:
+        values (pandas.Index): Distinct raw values.
+        column (str): Transformed column name.
+        layout (dict): Year layout spec.
+
+    Returns:
+        pandas.Index: Normalized values.
+    """
+    values = pd.Index(values, dtype=object)
+
+    if column in layout['state_columns']:
+        state_mapping = mapping('state_mapping')
+        values = pd.Index([state_mapping.get(value, value) for value in values], dtype=object)
+
+    if column in layout['titlecase_columns']:
+        values = values.str.strip().str.title()
+    elif column in layout['uppercase_columns']:
+        values = values.str.strip().str.upper()
+
+    return values
+
+
+def raw_column(column, layout):
+    """
+    Returns the worksheet column name a transformed column is read from.
+
+    Args:
+        column (str): Transformed column name.
+        layout (dict): Year layout spec.
+
+    Returns:
+        str: Raw column name.
+    """
+    raw_names = {name: raw_name for raw_name, name in layout['column_mapping'].items()}
+    return raw_names.get(column, column)
+
+
+def rescheduled_rows(data, layout):
+    """
+    Flags parsed rows whose drug is rescheduled during conversion (see generate_CS.reschedule).
+
+    Args:
+        data (pandas.DataFrame): Parsed worksheet data.
+        layout (dict): Year layout spec.
+
+    Returns:
+        numpy.ndarray: Boolean mask.
+    """
+    if not layout['reschedule']:
+        return np.zeros(len(data), dtype=bool)
+
+    drug_rescheduling_mapping = mapping('drug_rescheduling_mapping')
+    codes, names = pd.factorize(data[raw_column('Drug_Name_Strength', layout)])
+    names = normalized_values(names, 'Drug_Name_Strength', layout)
+    rescheduled = np.array([canonical_name(name) in drug_rescheduling_mapping for name in names] + [False])
+    return rescheduled[codes]
+
+
+def year_filters(layout, filters=None):
+    """
+    Combines a layout's row filters with additional filters and normalizes the allowed values.
+
+    Text values are normalized like the column they filter, so e.g. 'kent' matches 'Kent' and
+    'MI' matches 'Michigan'. Additional filters replace a layout filter on the same column.
+
+    Args:
+        layout (dict): Year layout spec.
+        filters (dict): Additional allowed values per transformed column.
+
+    Returns:
+        dict: Allowed values per transformed column.
+    """
+    combined = {}
+    for column, allowed in {**layout['row_filters'], **(filters or {})}.items():
+        if column == 'DEA_Drug_Schedule':
+            combined[column] = [int(value) for value in allowed]
+        else:
+            if column in layout['state_columns']:
+                # Accept state abbreviations in any case, e.g. 'mi'
+                state_mapping = mapping('state_mapping')
+                allowed = [state_mapping.get(str(value).strip().upper(), value) for value in allowed]
+            combined[column] = list(normalized_values(allowed, column, layout))
+
+    return combined
+
+
+def pushdown(data, filters, layout):
+    """
+    Drops the parsed rows that cannot pass the filters, before they are transformed.
+
+    Args:
+        data (pandas.DataFrame): Parsed worksheet data, with raw column names.
+        filters (dict): Allowed values per transformed column, returned by year_filters.
+        layout (dict): Year layout spec.
+
+    Returns:
+        pandas.DataFrame: Retained rows, with their original index.
+    """
+    keep = np.ones(len(data), dtype=bool)
+
+    for column, allowed in filters.items():
+        raw = data[raw_column(column, layout)]
+
+        if column == 'DEA_Drug_Schedule':
+            matches = schedule_digits(raw, layout).isin(allowed).to_numpy() | rescheduled_rows(data, layout)
+        else:
+            codes, uniques = pd.factorize(raw)
+            allowed = set(allowed)
+            matches = np.array([value in allowed for value in normalized_values(uniques, column, layout)] + [False])[codes]
+
+        keep &= matches
+
+    return data[keep]
+
+
+def apply_filters(data, filters):
+    """
+    Selects the transformed rows that pass the filters.
+
+    Args:
+        data (pandas.DataFrame): Transformed data.
+        filters (dict): Allowed values per transformed column, returned by year_filters.
+
+    Returns:
+        pandas.DataFrame: Rows passing every filter.
+    """
+    keep = np.ones(len(data), dtype=bool)
+    for column, allowed in filters.items():
+        keep &= data[column].isin(allowed).to_numpy()
+
+    return data[keep] if not keep.all() else data
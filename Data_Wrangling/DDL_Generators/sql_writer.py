@@ -0,0 +1,372 @@
+import argparse
+import gzip
+from itertools import count, islice
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from instrumentation import span
+
+try:
+    import zstandard
+except ImportError:  # only needed for zstd-compressed output
+    zstandard = None
+
+# Upper bound on the size of a single multi-row INSERT statement. MySQL rejects statements larger
+# than max_allowed_packet (4 MB by default before 8.0, 64 MB since), so stay well below it.
+max_statement_bytes = 1 << 20
+
+# Size of the write buffer used for SQL and LOAD DATA output files
+write_buffer_bytes = 1 << 20
+
+# Number of lines joined into a single write call by write_lines
+write_batch_lines = 10000
+
+# File name suffixes of the supported output compressions
+compression_suffixes = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+
+# Session settings for bulk loads: rows are inserted in one explicit transaction with unique and
+# foreign key checks disabled, then the settings are restored
+bulk_load_header = [
+    "SET autocommit=0;",
+    "SET unique_checks=0;",
+    "SET foreign_key_checks=0;",
+    "START TRANSACTION;"
+]
+
+bulk_load_footer = [
+    "COMMIT;",
+    "SET foreign_key_checks=1;",
+    "SET unique_checks=1;",
+    "SET autocommit=1;"
+]
+
+
+# Characters escaped in quoted SQL text literals
+sql_escapes = str.maketrans({'\\': '\\\\', "'": "\\'", '\n': '\\n', '\r': '\\r', '\0': '\\0'})
+
+
+def render_column(values, kind, null, escapes, quote=''):
+    """
+    Formats a whole column as literal strings at once.
+
+    Integers are truncated the way int() does, floats are formatted the way str() does and text is
+    escaped with the given translation table. Values that cannot be read as numbers in an
+    'int' or 'float' column are rendered as null. The column is factorized and only its distinct
+    values are formatted, so low-cardinality columns (counties, schedules, counts) are cheap.
+
+    Args:
+        values (pandas.Series): Column values.
+        kind (str): 'text', 'int' or 'float'.
+        null (str): Literal used for missing values.
+        escapes (dict): str.translate table applied to text values.
+        quote (str): Quote placed around text values.
+
+    Returns:
+        pandas.Series: Literal strings, with the index of values.
+    """
+    codes, uniques = pd.factorize(values)
+    uniques = pd.Index(uniques)
+
+    if kind == 'text':
+        rendered = (quote + uniques.astype(str).str.translate(escapes) + quote).to_numpy(dtype=object)
+    else:
+        numbers = pd.to_numeric(uniques, errors='coerce').to_numpy(dtype=float)
+        present = ~np.isnan(numbers)
+        rendered = np.full(len(uniques), null, dtype=object)
+        if kind == 'int':
+            rendered[present] = np.trunc(numbers[present]).astype(np.int64).astype(str)
+        else:
+            # Format the original values, so e.g. float32 values keep their shortest representation
+            rendered[present] = uniques.to_numpy()[present].astype(str)
+
+    return pd.Series(np.append(rendered, null)[codes], index=values.index, dtype=object)
+
+
+def sql_literals(values, kind):
+    """
+    Formats a whole column as SQL literals, using NULL for missing values.
+
+    Text is quoted with single quotes, with backslashes, quotes, line breaks and NUL characters escaped.
+
+    Args:
+        values (pandas.Series): Column values.
+        kind (str): 'text', 'int' or 'float'.
+
+    Returns:
+        pandas.Series: SQL literals.
+    """
+    return render_column(values, kind, 'NULL', sql_escapes, quote="'")
+
+
+def join_literals(literals, separator, prefix='', suffix=''):
+    """
+    Concatenates rendered columns row-wise into one string per row.
+
+    Args:
+        literals (list): Literal Series with the same index, e.g. returned by sql_literals.
+        separator (str): String placed between the values of a row.
+        prefix (str): String placed before each row, e.g. '('.
+        suffix (str): String placed after each row, e.g. ')'.
+
+    Returns:
+        list: One string per row.
+    """
+    return [prefix + separator.join(row) + suffix for row in zip(*[column.tolist() for column in literals])]
+
+
+def insert_prefix(table_name, columns):
+    """
+    Builds the 'INSERT INTO <table> (...) VALUES ' prefix shared by a table's INSERT statements.
+
+    Args:
+        table_name (str): Table name.
+        columns (list): Column names.
+
+    Returns:
+        str: INSERT statement prefix.
+    """
+    return f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES "
+
+
+def batched_inserts(prefix, value_rows, batch_size=1, max_statement_bytes=max_statement_bytes):
+    """
+    Groups rendered value tuples into INSERT statements of up to batch_size rows each.
+
+    A batch is also closed early when adding another row would make the statement larger than
+    max_statement_bytes. With batch_size=1 one statement is generated per row.
+
+    Args:
+        prefix (str): INSERT statement prefix returned by insert_prefix.
+        value_rows (iterable): Rendered value tuples, e.g. "(2013, 'Kent', 12)".
+        batch_size (int): Maximum number of rows per statement.
+        max_statement_bytes (int): Maximum statement size in bytes.
+
+    Yields:
+        str: INSERT statements.
+    """
+    if batch_size == 1:
+        for values in value_rows:
+            yield f"{prefix}{values};"
+        return
+
+    prefix = prefix.rstrip() + '\n'
+    batch = []
+    batch_bytes = len(prefix)
+    for values in value_rows:
+        row_bytes = len(values.encode()) + 2
+        if batch and (len(batch) == batch_size or batch_bytes + row_bytes > max_statement_bytes):
+            yield prefix + ',\n'.join(batch) + ';'
+            batch = []
+            batch_bytes = len(prefix)
+        batch.append(values)
+        batch_bytes += row_bytes
+
+    if batch:
+        yield prefix + ',\n'.join(batch) + ';'
+
+
+# Characters escaped in LOAD DATA text fields
+tsv_escapes = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r', '\0': '\\0'})
+
+
+def tsv_fields(values, kind):
+    """
+    Formats a whole column as LOAD DATA fields, using \\N for missing values.
+
+    Backslashes, tabs and line breaks in text are escaped the way LOAD DATA expects with
+    FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\'.
+
+    Args:
+        values (pandas.Series): Column values.
+        kind (str): 'text', 'int' or 'float'.
+
+    Returns:
+        pandas.Series: LOAD DATA fields.
+    """
+    return render_column(values, kind, '\\N', tsv_escapes)
+
+
+def load_data_statement(table_name, columns, data_file):
+    """
+    Builds a LOAD DATA LOCAL INFILE statement for a tab-separated file written with tsv_fields.
+
+    Args:
+        table_name (str): Table name.
+        columns (list): Column names, in the order of the file's fields.
+        data_file (Path): Path of the data file, as seen from the directory the mysql client is run in.
+
+    Returns:
+        str: LOAD DATA statement.
+    """
+    return '\n'.join([
+        f"LOAD DATA LOCAL INFILE '{Path(data_file).as_posix()}'",
+        f"INTO TABLE {table_name}",
+        "CHARACTER SET utf8mb4",
+        "FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\'",
+        "LINES TERMINATED BY '\\n'",
+        f"({', '.join(columns)});"
+    ])
+
+
+def output_path(path, compression=None):
+    """
+    Returns the path an output file is written to, including the compression suffix.
+
+    Args:
+        path (Path): Uncompressed output path.
+        compression (str): None, 'gzip' or 'zstd'.
+
+    Returns:
+        Path: Output path.
+    """
+    return Path(f"{path}{compression_suffixes[compression]}")
+
+
+def open_output(path, compression=None):
+    """
+    Opens a buffered, optionally compressed, text file for writing SQL or LOAD DATA output.
+
+    Args:
+        path (Path): Output path, including any compression suffix (see output_path).
+        compression (str): None, 'gzip' or 'zstd'.
+
+    Returns:
+        file object: Writable text file.
+    """
+    if compression == 'gzip':
+        return gzip.open(path, 'wt', newline='\n')
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ImportError("zstd output requires the zstandard package (pip install zstandard)")
+        return zstandard.open(path, 'wt', newline='\n')
+    return open(path, 'w', buffering=write_buffer_bytes, newline='\n')
+
+
+def write_lines(file, lines):
+    """
+    Writes lines to a file as they are produced, each followed by a line break.
+
+    Lines are joined and written write_batch_lines at a time rather than one write call per line.
+
+    Args:
+        file (file object): Writable text file.
+        lines (iterable): Lines (or statements) without line terminators.
+
+    Returns:
+        int: Number of lines written.
+    """
+    lines = iter(lines)
+    count = 0
+    while True:
+        batch = list(islice(lines, write_batch_lines))
+        if not batch:
+            return count
+        batch.append('')
+        file.write('\n'.join(batch))
+        count += len(batch) - 1
+
+
+def write_table(path, ddl, prefix, value_rows, batch_size=1, compression=None):
+    """
+    Streams a table's DDL and INSERT statements to an SQL file as they are rendered.
+
+    Multi-row INSERTs are wrapped in a bulk load transaction (see bulk_load_header).
+
+    Args:
+        path (Path): Uncompressed SQL file path, e.g. 2013_CS.SQL.
+        ddl (str): CREATE TABLE statement, written before the INSERT statements.
+        prefix (str): INSERT statement prefix returned by insert_prefix.
+        value_rows (iterable): INSERT value tuples, e.g. rendered with join_literals.
+        batch_size (int): Maximum number of rows per INSERT statement.
+        compression (str): None, 'gzip' or 'zstd'.
+
+    Returns:
+        Path: Path of the written SQL file.
+    """
+    # Count the rows as batched_inserts consumes them; after n rows the counter yields n + 1
+    counter = count(1)
+    value_rows = (value_row for value_row, _ in zip(value_rows, counter))
+    inserts = batched_inserts(prefix, value_rows, batch_size)
+
+    sql_file = output_path(path, compression)
+    with span('write') as stage, open_output(sql_file, compression) as file:
+        file.write(ddl + '\n')
+        if batch_size > 1:
+            write_lines(file, bulk_load_header)
+            write_lines(file, inserts)
+            write_lines(file, bulk_load_footer)
+        else:
+            write_lines(file, inserts)
+        stage.rows = next(counter) - 1
+
+    print(f"DDL and INSERT statements generated and saved to {sql_file}")
+
+    return sql_file
+
+
+def write_load_data(path, ddl, table_name, columns, lines, compression=None):
+    """
+    Writes a table's rows to a tab-separated file, together with a *_Load_Data.SQL script holding
+    the DDL and the LOAD DATA LOCAL INFILE statement for that file.
+
+    LOAD DATA cannot read compressed files, so with compression the statement still names the
+    uncompressed file, which has to be decompressed from the written .tsv.gz/.tsv.zst file first.
+
+    Args:
+        path (Path): Uncompressed data file path, e.g. 2013_CS.tsv; the script is written next to it.
+        ddl (str): CREATE TABLE statement, written before the LOAD DATA statement.
+        table_name (str): Table name.
+        columns (list): Column names, in the order of the file's fields.
+        lines (iterable): Tab-separated lines, e.g. rendered with tsv_fields and join_literals.
+        compression (str): None, 'gzip' or 'zstd'.
+
+    Returns:
+        Path: Path of the written LOAD DATA script.
+    """
+    path = Path(path)
+    data_file = output_path(path, compression)
+    with span('write_load_data') as stage, open_output(data_file, compression) as file:
+        stage.rows = write_lines(file, lines)
+
+    script_file = path.with_name(f"{path.stem}_Load_Data.SQL")
+    with open(script_file, 'w', newline='\n') as file:
+        file.write(ddl + '\n')
+        file.write(load_data_statement(table_name, columns, path) + '\n')
+
+    print(f"DDL and LOAD DATA statements generated and saved to {script_file}")
+    if compression:
+        print(f"Decompress {data_file} to {path} before running {script_file}")
+
+    return script_file
+
+
+def positive_int(value):
+    """
+    Parses a command line count that must be 1 or greater.
+
+    Args:
+        value (str): Argument value.
+
+    Returns:
+        int: Parsed value.
+    """
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be 1 or greater, got {value}")
+    return number
+
+
+def add_output_arguments(parser, data_file):
+    """
+    Adds the --batch-size, --load-data and --compression options of the SQL generators to a parser.
+
+    Args:
+        parser (argparse.ArgumentParser): Command line parser.
+        data_file (str): Name of the LOAD DATA file(s) shown in the help, e.g. '<year>_CS.tsv'.
+    """
+    parser.add_argument('--batch-size', type=positive_int, default=1,
+                        help='Rows per multi-row INSERT statement; above 1 the inserts are also wrapped in a bulk load transaction (default: %(default)s)')
+    parser.add_argument('--load-data', action='store_true',
+                        help=f'Also write {data_file} and a LOAD DATA LOCAL INFILE script for it')
+    parser.add_argument('--compression', choices=['gzip', 'zstd'],
+                        help='Compress the SQL and LOAD DATA output files; the LOAD DATA script names the uncompressed file, so decompress it before running the script')
@@ -0,0 +1,167 @@
+# Synthetic Drug Utilization Report worksheets for benchmarking.
+#
+# The real Raw_Data workbooks cannot be shipped with the repository, so benchmark.py runs the
+# pipeline on worksheets generated here instead. Every worksheet has the raw column names of the
+# layout it is generated for, drug names drawn from data_mappings.drug_name_mapping and a summary
+# row at the end, so it goes through generate_CS.py exactly like a parsed worksheet would.
+import numpy as np
+import pandas as pd
+from data_mappings import drug_name_mapping
+from year_layouts import year_layouts
+
+michigan_counties = [
+    'ALCONA', 'ALGER', 'ALLEGAN', 'ALPENA', 'ANTRIM', 'ARENAC', 'BARAGA', 'BARRY', 'BAY', 'BENZIE',
+    'BERRIEN', 'BRANCH', 'CALHOUN', 'CASS', 'CHARLEVOIX', 'CHEBOYGAN', 'CHIPPEWA', 'CLARE', 'CLINTON',
+    'CRAWFORD', 'DELTA', 'DICKINSON', 'EATON', 'EMMET', 'GENESEE', 'GLADWIN', 'GOGEBIC', 'GRAND TRAVERSE',
+    'GRATIOT', 'HILLSDALE', 'HOUGHTON', 'HURON', 'INGHAM', 'IONIA', 'IOSCO', 'IRON', 'ISABELLA', 'JACKSON',
+    'KALAMAZOO', 'KALKASKA', 'KENT', 'KEWEENAW', 'LAKE', 'LAPEER', 'LEELANAU', 'LENAWEE', 'LIVINGSTON',
+    'LUCE', 'MACKINAC', 'MACOMB', 'MANISTEE', 'MARQUETTE', 'MASON', 'MECOSTA', 'MENOMINEE', 'MIDLAND',
+    'MISSAUKEE', 'MONROE', 'MONTCALM', 'MONTMORENCY', 'MUSKEGON', 'NEWAYGO', 'OAKLAND', 'OCEANA', 'OGEMAW',
+    'ONTONAGON', 'OSCEOLA', 'OSCODA', 'OTSEGO', 'OTTAWA', 'PRESQUE ISLE', 'ROSCOMMON', 'SAGINAW', 'SANILAC',
+    'SCHOOLCRAFT', 'SHIAWASSEE', 'ST. CLAIR', 'ST. JOSEPH', 'TUSCOLA', 'VAN BUREN', 'WASHTENAW', 'WAYNE',
+    'WEXFORD'
+]
+
+# Patient/prescriber states, most prescriptions are filled by Michigan residents
+states = ['MI', 'OH', 'IN', 'WI', 'IL']
+state_weights = [0.94, 0.02, 0.02, 0.01, 0.01]
+
+age_ranges = ['Ages 4 and younger', 'Ages 5 To 17', 'Ages 18 To 24', 'Ages 25 To 34', 'Ages 35 To 44',
+              'Ages 45 To 54', 'Ages 55 To 64', 'Ages 65 and older']
+
+# AHFS descriptions; MMEs are only reported for the opiate classes
+ahfs_descriptions = ['OPIATE AGONISTS', 'OPIATE PARTIAL AGONISTS', 'BENZODIAZEPINES (ANXIOLYTIC)',
+                     'AMPHETAMINES', 'ANTICONVULSANTS, MISCELLANEOUS']
+opiate_descriptions = ['OPIATE AGONISTS', 'OPIATE PARTIAL AGONISTS']
+
+
+def drug_catalog(rng):
+    """
+    Assigns every raw drug name in drug_name_mapping a fixed AHFS description and DEA schedule.
+
+    Args:
+        rng (numpy.random.Generator): Random number generator.
+
+    Returns:
+        pandas.DataFrame: 'name', 'ahfs' and 'schedule' columns, one row per drug.
+    """
+    names = np.array(sorted(drug_name_mapping), dtype=object)
+    return pd.DataFrame({
+        'name': names,
+        'ahfs': rng.choice(np.array(ahfs_descriptions, dtype=object), len(names), p=[0.45, 0.05, 0.25, 0.15, 0.10]),
+        'schedule': rng.choice([2, 3, 4, 5], len(names), p=[0.5, 0.15, 0.3, 0.05])
+    })
+
+
+def county_worksheet(rows, rng, catalog, sheet_name):
+    """
+    Generates a PRESCRIBER COUNTY or PATIENT COUNTY worksheet as found in the 2013-2017 reports.
+
+    Each worksheet only holds the county and state columns of its own side, e.g. PATIENT COUNTY
+    and PATIENT STATE.
+
+    Args:
+        rows (int): Number of data rows, excluding the summary row.
+        rng (numpy.random.Generator): Random number generator.
+        catalog (pandas.DataFrame): Drugs returned by drug_catalog.
+        sheet_name (str): 'PRESCRIBER COUNTY' or 'PATIENT COUNTY'.
+
+    Returns:
+        pandas.DataFrame: Worksheet with raw column names.
+    """
+    side = sheet_name.split()[0]
+    drugs = catalog.iloc[rng.integers(0, len(catalog), rows)]
+
+    worksheet = pd.DataFrame({
+        f'{side} COUNTY': rng.choice(np.array(michigan_counties, dtype=object), rows),
+        f'{side} STATE': rng.choice(np.array(states, dtype=object), rows, p=state_weights),
+        'DRUG NAME/STRENGTH': drugs['name'].to_numpy(),
+        'AHFS DESCRIPTION': drugs['ahfs'].to_numpy(),
+        'DEA DRUG SCHEDULE': drugs['schedule'].to_numpy(),
+        'PRESCRIPTION COUNT (#)': rng.integers(1, 5000, rows),
+        'PRESCRIPTION QUANTITY (#)': rng.integers(1, 200000, rows),
+    })
+
+    return with_summary_row(worksheet, ['PRESCRIPTION COUNT (#)', 'PRESCRIPTION QUANTITY (#)'])
+
+
+def patient_worksheet(rows, rng, catalog, zip_codes=False):
+    """
+    Generates a Patient County or Patient Zip and County worksheet as found in the 2018-2022 reports.
+
+    Args:
+        rows (int): Number of data rows, excluding the summary row.
+        rng (numpy.random.Generator): Random number generator.
+        catalog (pandas.DataFrame): Drugs returned by drug_catalog.
+        zip_codes (bool): Whether the PATIENT ZIP and AVERAGE DAYS SUPPLY columns of the 'Patient Zip and County'
+            worksheets are included.
+
+    Returns:
+        pandas.DataFrame: Worksheet with raw column names.
+    """
+    drugs = catalog.iloc[rng.integers(0, len(catalog), rows)]
+    opiate = drugs['ahfs'].isin(opiate_descriptions).to_numpy()
+    prescriptions = rng.integers(1, 5000, rows)
+
+    worksheet = pd.DataFrame({
+        'PATIENT COUNTY': rng.choice(np.array(michigan_counties, dtype=object), rows),
+        'PATIENT STATE': rng.choice(np.array(states, dtype=object), rows, p=state_weights),
+        'AGE RANGE': rng.choice(np.array(age_ranges, dtype=object), rows),
+        'DRUG NAME/STRENGTH': drugs['name'].to_numpy(),
+        'AHFS DESCRIPTION': drugs['ahfs'].to_numpy(),
+        'DRUG SCHEDULE': 'Schedule ' + drugs['schedule'].astype(str).to_numpy(dtype=object),
+        'PRESCRIPTION COUNT': prescriptions,
+        'PRESCRIPTION QUANTITY (DOSAGE UNITS)': prescriptions * rng.integers(10, 120, rows),
+        'PATIENT COUNT': np.maximum(prescriptions // rng.integers(1, 6, rows), 1),
+        'DAYS SUPPLY': prescriptions * rng.integers(5, 31, rows),
+        'AVERAGE DAILY MMEs (*ONLY CALCULATED FOR OPIATE AGONISTS AND OPIATE PARTIAL AGONISTS)':
+            np.where(opiate, np.round(rng.gamma(2.0, 20.0, rows), 2), np.nan),
+        'PRESCRIPTION COUNT GREATER THAN OR EQUAL TO 90 MMEs (*ONLY CALCULATED FOR OPIATE AGONISTS AND OPIATE PARTIAL AGONISTS)':
+            np.where(opiate, rng.binomial(prescriptions, 0.1), np.nan),
+    })
+
+    if zip_codes:
+        worksheet.insert(2, 'PATIENT ZIP', rng.integers(48001, 49972, rows).astype(str).astype(object))
+        worksheet['AVERAGE DAYS SUPPLY'] = np.round(worksheet['DAYS SUPPLY'] / prescriptions, 2)
+
+    return with_summary_row(worksheet, ['PRESCRIPTION COUNT', 'PRESCRIPTION QUANTITY (DOSAGE UNITS)', 'PATIENT COUNT', 'DAYS SUPPLY'])
+
+
+def with_summary_row(worksheet, total_columns):
+    """
+    Appends the summary row that ends every Drug Utilization Report worksheet.
+
+    Args:
+        worksheet (pandas.DataFrame): Worksheet data rows.
+        total_columns (list): Columns summed in the summary row.
+
+    Returns:
+        pandas.DataFrame: Worksheet including the summary row.
+    """
+    summary = pd.DataFrame([{worksheet.columns[0]: 'TOTAL', **worksheet[total_columns].sum().to_dict()}])
+    return pd.concat([worksheet, summary], ignore_index=True)
+
+
+def synthetic_worksheets(year, rows, seed=0):
+    """
+    Generates every worksheet listed in a year's layout.
+
+    Args:
+        year (int): Reporting year, must be a key of year_layouts.
+        rows (int): Number of data rows per worksheet.
+        seed (int): Random seed; the same seed always generates the same worksheets.
+
+    Returns:
+        dict: Worksheet DataFrames keyed by worksheet name.
+    """
+    rng = np.random.default_rng([seed, year])
+    catalog = drug_catalog(rng)
+    worksheets = {}
+
+    for sheet_name in year_layouts[year]['worksheets']:
+        if sheet_name in ('PRESCRIBER COUNTY', 'PATIENT COUNTY'):
+            worksheets[sheet_name] = county_worksheet(rows, rng, catalog, sheet_name)
+        else:
+            worksheets[sheet_name] = patient_worksheet(rows, rng, catalog, zip_codes='Zip' in sheet_name)
+
+    return worksheets
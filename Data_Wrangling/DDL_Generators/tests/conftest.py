@@ -0,0 +1,15 @@
+import sys
+from pathlib import Path
+import pytest
+
+# The DDL generators import each other as top-level modules, the way they are run as scripts
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+@pytest.fixture(autouse=True)
+def working_dir(tmp_path, monkeypatch):
+    """
+    Runs every test from an empty directory, so Processed_Data caches and output files stay out of the repository.
+    """
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from clean_population_data import combined_age_brackets, process_file, process_combined_file
+
+combined_columns = [column for columns in combined_age_brackets.values() for column in columns]
+
+
+def combined_file(tmp_path, rows):
+    """
+    Writes a combined (2022) population file with the given (county, year, counts) rows.
+    """
+    path = tmp_path / 'Combined_Data.csv'
+    lines = [','.join(['STNAME', 'CTYNAME', 'YEAR'] + combined_columns)]
+    lines += [','.join(['Michigan', county, str(year)] + counts) for county, year, counts in rows]
+    path.write_text('\n'.join(lines) + '\n')
+    return str(path)
+
+
+def test_combined_file_rows(tmp_path):
+    counts = [str(count) for count in range(1, len(combined_columns) + 1)]
+    # Wayne County lacks AGE1417_TOT, so its 5-17 bracket is missing
+    missing = counts.copy()
+    missing[combined_columns.index('AGE1417_TOT')] = ''
+    path = combined_file(tmp_path, [('Kent County', 1, counts), ('Wayne County', 4, missing), ('Kent County', 4, counts),
+                                    ('Alcona County', 4, counts)])
+
+    processed = process_combined_file(path)
+
+    assert list(processed.columns) == ['County', 'Year', 'Age_Bracket', 'Population_Total']
+    assert list(processed['County']) == [county for county in ['Wayne County', 'Kent County', 'Alcona County'] for _ in combined_age_brackets]
+    assert list(processed['Age_Bracket']) == list(combined_age_brackets) * 3
+    assert set(processed['Year']) == {2022}
+
+    totals = processed['Population_Total'].to_numpy()
+    assert np.isnan(totals[1])
+    assert list(totals[8:16]) == [1, 2 + 3, 4, 5 + 6, 7 + 8, 9 + 10, 11 + 12, 13]
+
+
+def test_invalid_counts_are_reported_as_written(tmp_path):
+    # Kids.csv counts are read from the 5th (<1) and 7th (1-4) columns
+    path = tmp_path / '2013' / 'Kids.csv'
+    path.parent.mkdir()
+    path.write_text('County,c1,c2,c3,c4,c5,c6\n'
+                    'Kent County,0,0,0,"1,645",0,"1,897"\n'
+                    'Wayne County,0,0,0,N/A,0,-\n'
+                    'Alcona County,0,0,0,,0,12.5\n'
+                    'Michigan,0,0,0,NA,0,0\n')
+
+    with pytest.raises(ValueError) as error:
+        process_file(str(path), {})
+
+    rows = [line.split() for line in str(error.value).splitlines()[2:]]
+    assert rows == [['3', '<1', 'N/A', 'integer'], ['4', '<1', 'NaN', 'integer'],
+                    ['3', '1-4', '-', 'integer'], ['4', '1-4', '12.5', 'integer']]
@@ -0,0 +1,157 @@
+import sqlite3
+import pytest
+import db_loader
+from db_loader import SQLitePool, MySQLPool, create_pool, insert_chunk, load_rows
+
+statement = "INSERT INTO Population (County, Population_Total) VALUES (?, ?)"
+
+
+class FlakyCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def executemany(self, statement, rows):
+        self.connection.executed.append(list(rows))
+        if self.connection.execute_errors:
+            raise self.connection.execute_errors.pop(0)
+
+    def close(self):
+        if self.connection.close_error:
+            raise self.connection.close_error
+
+
+class FlakyConnection:
+    """
+    DB-API connection stand-in that fails executemany with the queued errors and records every call.
+    """
+
+    def __init__(self, execute_errors=(), close_error=None):
+        self.execute_errors = list(execute_errors)
+        self.close_error = close_error
+        self.executed = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FlakyCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class FlakyPool:
+    def __init__(self, connection):
+        self.connection = connection
+        self.released = []
+
+    def get_connection(self):
+        return self.connection
+
+    def release(self, connection, discard=False):
+        self.released.append(discard)
+
+
+def test_retries_transient_errors_after_rollback():
+    connection = FlakyConnection([sqlite3.OperationalError('database is locked')])
+    pool = FlakyPool(connection)
+
+    insert_chunk(pool, statement, [('Kent', 1)], retry_delay=0)
+
+    assert connection.executed == [[('Kent', 1)], [('Kent', 1)]]
+    assert (connection.rollbacks, connection.commits) == (1, 1)
+    assert pool.released == [True, False]
+
+
+def test_raises_other_errors_without_retrying():
+    connection = FlakyConnection([sqlite3.IntegrityError('NOT NULL constraint failed')])
+    pool = FlakyPool(connection)
+
+    with pytest.raises(sqlite3.IntegrityError):
+        insert_chunk(pool, statement, [('Kent', None)], retry_delay=0)
+
+    assert len(connection.executed) == 1
+    assert (connection.rollbacks, connection.commits) == (1, 0)
+    assert pool.released == [False]
+
+
+def test_gives_up_after_retries():
+    connection = FlakyConnection([sqlite3.OperationalError('database is locked')] * 3)
+    pool = FlakyPool(connection)
+
+    with pytest.raises(sqlite3.OperationalError):
+        insert_chunk(pool, statement, [('Kent', 1)], retries=2, retry_delay=0)
+
+    assert len(connection.executed) == 3
+    assert connection.commits == 0
+
+
+def test_errors_after_commit_are_not_retried():
+    connection = FlakyConnection(close_error=sqlite3.OperationalError('database is locked'))
+    pool = FlakyPool(connection)
+
+    with pytest.raises(sqlite3.OperationalError):
+        insert_chunk(pool, statement, [('Kent', 1)], retry_delay=0)
+
+    assert len(connection.executed) == 1
+    assert (connection.rollbacks, connection.commits) == (0, 1)
+    assert pool.released == [False]
+
+
+def test_failed_chunk_is_rolled_back(tmp_path):
+    pool = create_pool(f"sqlite:///{tmp_path / 'population.db'}")
+    db_loader.create_table(pool, "CREATE TABLE IF NOT EXISTS Population (County TEXT NOT NULL, Population_Total INT)")
+    rows = [('Kent', 1), ('Wayne', 2), ('Ionia', 3), (None, 4)]
+
+    with pytest.raises(sqlite3.IntegrityError):
+        load_rows(pool, 'Population', ['County', 'Population_Total'], rows, chunk_size=2)
+
+    # The first chunk is committed, none of the failed chunk's rows are
+    connection = sqlite3.connect(tmp_path / 'population.db')
+    assert connection.execute("SELECT County FROM Population ORDER BY Population_Total").fetchall() == [('Kent',), ('Wayne',)]
+    connection.close()
+
+
+def test_load_rows_counts_every_chunk(tmp_path):
+    pool = create_pool(f"sqlite:///{tmp_path / 'population.db'}")
+    db_loader.create_table(pool, "CREATE TABLE IF NOT EXISTS Population (County TEXT, Population_Total INT)")
+
+    assert load_rows(pool, 'Population', ['County', 'Population_Total'], ((f"County {row}", row) for row in range(7)), chunk_size=3) == 7
+    with db_loader.pooled_connection(pool) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM Population").fetchone() == (7,)
+
+
+def test_sqlite_pool_replaces_discarded_connections(tmp_path):
+    pool = SQLitePool(str(tmp_path / 'population.db'))
+    connection = pool.get_connection()
+
+    pool.release(connection, discard=True)
+
+    replacement = pool.get_connection()
+    assert replacement is not connection
+    replacement.execute("SELECT 1")
+    with pytest.raises(sqlite3.ProgrammingError):
+        connection.execute("SELECT 1")
+
+
+class PooledConnection:
+    def __init__(self):
+        self.calls = []
+
+    def disconnect(self):
+        self.calls.append('disconnect')
+
+    def close(self):
+        self.calls.append('close')
+
+
+@pytest.mark.parametrize('discard, calls', [(False, ['close']), (True, ['disconnect', 'close'])])
+def test_mysql_pool_disconnects_discarded_connections(discard, calls):
+    pool = object.__new__(MySQLPool)
+    connection = PooledConnection()
+
+    pool.release(connection, discard)
+
+    assert connection.calls == calls
@@ -0,0 +1,41 @@
+import data_mappings
+from drug_names import name_key, build_key_index, canonical_names
+
+abbreviations = {'COD': 'CODEINE', 'TAB': 'TABLET', 'SOLN': 'SOLUTION', 'PCKT': 'PACKET'}
+
+
+def test_name_key_expands_abbreviations():
+    assert name_key('Acetaminophen/Cod #3 Tab', abbreviations) == 'ACETAMINOPHEN CODEINE #3 TABLET'
+    assert name_key('ANDROGEL 1.62%(2.5G) GEL PCKT', abbreviations) == 'ANDROGEL 1.62% 2.5G GEL PACKET'
+    assert name_key('  morphine   sulfate  soln. ', abbreviations) == 'MORPHINE SULFATE SOLUTION'
+
+
+def test_name_key_keeps_numbers():
+    assert name_key('GUAIFENESIN 1,000 MG TAB', abbreviations) == 'GUAIFENESIN 1000 MG TABLET'
+    assert name_key('HYDROCODONE-APAP 7.5-325', abbreviations) == 'HYDROCODONE APAP 7.5 325'
+
+
+def test_key_index_resolves_raw_and_standardized_names():
+    index = build_key_index({'TYLENOL/COD #3 TAB': 'ACETAMINOPHEN-CODEINE #3 TABLET'}, abbreviations)
+
+    assert index == {
+        'TYLENOL CODEINE #3 TABLET': 'ACETAMINOPHEN-CODEINE #3 TABLET',
+        'ACETAMINOPHEN CODEINE #3 TABLET': 'ACETAMINOPHEN-CODEINE #3 TABLET'
+    }
+
+
+def test_key_index_leaves_out_ambiguous_keys():
+    # 'A-B TAB' and 'A/B TAB' share the key 'A B TABLET' but standardize differently
+    index = build_key_index({'A-B TAB': 'DRUG ONE', 'A/B TAB': 'DRUG TWO', 'C TAB': 'DRUG THREE', 'C-TAB': 'DRUG THREE'}, abbreviations)
+
+    assert 'A B TABLET' not in index
+    assert index['C TABLET'] == 'DRUG THREE'
+
+
+def test_canonical_names():
+    key_index = build_key_index(data_mappings.drug_name_mapping, data_mappings.drug_name_abbreviations)
+    raw_name, standardized_name = next((raw_name, standardized_name) for raw_name, standardized_name in data_mappings.drug_name_mapping.items()
+                                       if key_index.get(name_key(raw_name, data_mappings.drug_name_abbreviations)) == standardized_name)
+    respelled_name = f"  {raw_name.lower().replace(' ', '  ')} "
+
+    assert canonical_names([raw_name, respelled_name, 'NOT A DRUG 5 MG TABLET']) == [standardized_name, standardized_name, 'NOT A DRUG 5 MG TABLET']
@@ -0,0 +1,75 @@
+import shutil
+import pytest
+import data_mappings
+import mapping_store
+from drug_names import build_key_index
+
+
+@pytest.fixture
+def tables(tmp_path):
+    return mapping_store.load_mappings(tmp_path / 'Mapping_Cache')
+
+
+def expected_mappings():
+    sources = {name: getattr(data_mappings, name) for name in mapping_store.mapping_kinds if hasattr(data_mappings, name)}
+    sources['drug_name_keys'] = build_key_index(data_mappings.drug_name_mapping, data_mappings.drug_name_abbreviations)
+    return sources
+
+
+@pytest.mark.parametrize('name', sorted(mapping_store.mapping_kinds))
+def test_round_trip(tables, name):
+    expected = expected_mappings()[name]
+    table = tables[name]
+
+    assert len(table) == len(expected)
+    assert dict(table.items()) == expected
+    for key, value in expected.items():
+        assert key in table
+        assert table[key] == value
+        assert table.get(key) == value
+
+
+def test_missing_keys(tables):
+    table = tables['drug_name_mapping']
+
+    assert table.get('NOT A DRUG 5 MG TABLET') is None
+    assert table.get('NOT A DRUG 5 MG TABLET', 'fallback') == 'fallback'
+    assert table.get(None) is None
+    assert float('nan') not in table
+    with pytest.raises(KeyError):
+        table['NOT A DRUG 5 MG TABLET']
+
+
+def test_artifact_is_memory_mapped(tmp_path, tables):
+    artifacts = list((tmp_path / 'Mapping_Cache').glob('data_mappings-*.bin'))
+
+    assert len(artifacts) == 1
+    assert dict(mapping_store.load_mappings(tmp_path / 'Mapping_Cache')['state_mapping'].items()) == data_mappings.state_mapping
+
+
+@pytest.mark.parametrize('source_name', ['data_mappings.py', 'drug_names.py'])
+def test_rebuilds_when_sources_change(tmp_path, monkeypatch, source_name):
+    sources = []
+    for source_file in mapping_store.source_files:
+        shutil.copy(source_file, tmp_path / source_file.name)
+        sources.append(tmp_path / source_file.name)
+    monkeypatch.setattr(mapping_store, 'source_files', sources)
+
+    compiles = []
+    compile_arrays = mapping_store.compile_arrays
+    monkeypatch.setattr(mapping_store, 'compile_arrays', lambda: compiles.append(1) or compile_arrays())
+
+    artifact_dir = tmp_path / 'Mapping_Cache'
+    mapping_store.load_mappings(artifact_dir)
+    mapping_store.load_mappings(artifact_dir)
+    first_artifact, = artifact_dir.glob('data_mappings-*.bin')
+    assert len(compiles) == 1
+
+    with open(tmp_path / source_name, 'a') as source_file:
+        source_file.write('\n# changed\n')
+    tables = mapping_store.load_mappings(artifact_dir)
+
+    second_artifact, = artifact_dir.glob('data_mappings-*.bin')
+    assert len(compiles) == 2
+    assert second_artifact != first_artifact
+    assert dict(tables['drug_name_mapping'].items()) == data_mappings.drug_name_mapping
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+from population_index import PopulationIndex
+
+# Population rows as written by clean_population_data.py: the 2013-2021 files have no 5-17 bracket
+population_rows = [
+    ('Kent County', 2014, '0-4', 100), ('Kent County', 2014, '18-24', 200), ('Kent County', 2014, '65+', 300),
+    ('Kent County', 2022, '0-4', 110), ('Kent County', 2022, '5-17', 50), ('Kent County', 2022, '18-24', 210),
+    ('Kent County', 2022, '65+', 310)
+]
+
+
+def population_index():
+    return PopulationIndex.from_frame(pd.DataFrame(population_rows, columns=['County', 'Year', 'Age_Bracket', 'Population_Total']))
+
+
+def test_all_ages_rates_before_2022():
+    # 2013-2017 prescription frames have no age bracket column
+    prescriptions = pd.DataFrame({
+        'Prescription_Year': [2014, 2022, 2014],
+        'PATIENT COUNTY': ['Kent', 'Kent', 'Kent'],
+        'PATIENT STATE': ['Michigan', 'Michigan', 'Ohio'],
+        'Total_Prescriptions': [60, 67, 5]
+    })
+
+    rates = population_index().attach_rates(prescriptions)
+
+    np.testing.assert_array_equal(rates['Population_Total'], [600, 680, np.nan])
+    np.testing.assert_array_equal(rates['Population_Partial'], [True, False, False])
+    np.testing.assert_allclose(rates['Total_Prescriptions_Per_1000'], [100, 67 * 1000 / 680, np.nan])
+
+
+def test_bracket_rates():
+    prescriptions = pd.DataFrame({
+        'Prescription_Year': [2014, 2014, 2022],
+        'PATIENT COUNTY': ['Kent', 'Kent', 'KENT'],
+        'Patient_Age_Bracket': ['Ages 18 To 24', 'Ages 5 To 17', 'Ages 5 To 17'],
+        'Total_Prescriptions': [20, 1, 5]
+    })
+
+    rates = population_index().attach_rates(prescriptions)
+
+    np.testing.assert_array_equal(rates['Population_Total'], [200, np.nan, 50])
+    np.testing.assert_array_equal(rates['Population_Partial'], [False, False, False])
+    np.testing.assert_allclose(rates['Total_Prescriptions_Per_1000'], [100, np.nan, 100])
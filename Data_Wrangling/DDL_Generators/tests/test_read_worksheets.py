@@ -0,0 +1,93 @@
+import pandas as pd
+from pandas.io.parsers import TextParser
+import pytest
+import generate_CS
+import workbook_cache
+from synthetic_reports import synthetic_worksheets
+from year_layouts import year_layouts
+
+# Header rows of the real report worksheets; the 2013-2017 county worksheets only hold their own
+# county and state columns
+county_headers = ['DRUG NAME/STRENGTH', 'AHFS DESCRIPTION', 'DEA DRUG SCHEDULE', 'PRESCRIPTION COUNT (#)', 'PRESCRIPTION QUANTITY (#)']
+
+patient_headers = [
+    'PATIENT COUNTY', 'PATIENT STATE', 'AGE RANGE', 'DRUG NAME/STRENGTH', 'AHFS DESCRIPTION', 'DRUG SCHEDULE',
+    'PRESCRIPTION COUNT', 'PRESCRIPTION QUANTITY (DOSAGE UNITS)', 'PATIENT COUNT', 'DAYS SUPPLY',
+    'AVERAGE DAILY MMEs (*ONLY CALCULATED FOR OPIATE AGONISTS AND OPIATE PARTIAL AGONISTS)',
+    'PRESCRIPTION COUNT GREATER THAN OR EQUAL TO 90 MMEs (*ONLY CALCULATED FOR OPIATE AGONISTS AND OPIATE PARTIAL AGONISTS)'
+]
+
+worksheet_headers = {
+    'PRESCRIBER COUNTY': ['PRESCRIBER COUNTY', 'PRESCRIBER STATE'] + county_headers,
+    'PATIENT COUNTY': ['PATIENT COUNTY', 'PATIENT STATE'] + county_headers,
+    'Patient County': patient_headers,
+    'Patient Zip and County': patient_headers[:2] + ['PATIENT ZIP'] + patient_headers[2:] + ['AVERAGE DAYS SUPPLY']
+}
+
+
+def worksheet_rows(sheet_name, rows=3):
+    """
+    Builds the cells of a worksheet shaped like the real one: a header row, data rows and a summary row.
+    """
+    headers = worksheet_headers[sheet_name]
+    data = [[f"{header} {row}" if 'COUNT' not in header or 'COUNTY' in header else row for header in headers] for row in range(rows)]
+    return [headers] + data + [['TOTAL'] + [None] * (len(headers) - 1)]
+
+
+class SheetFile:
+    """
+    Stands in for pandas.ExcelFile, parsing in-memory cells with the parser read_excel hands them to.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def parse(self, sheet_name, usecols=None, dtype=None):
+        return TextParser(worksheet_rows(sheet_name), header=0, usecols=usecols, dtype=dtype).read()
+
+
+@pytest.mark.parametrize('year', sorted(year_layouts))
+def test_read_worksheets_real_shaped_sheets(year, monkeypatch):
+    monkeypatch.setattr(workbook_cache.pd, 'ExcelFile', SheetFile)
+    layout = year_layouts[year]
+
+    data = generate_CS.read_worksheets(layout, use_cache=False)
+
+    assert len(data) == 3 * len(layout['worksheets'])
+    for sheet_name in layout['worksheets']:
+        assert set(layout['usecols'][sheet_name]) <= set(data.columns)
+        assert not data.loc[sheet_name, layout['usecols'][sheet_name]].isna().any().any()
+    assert set(data.columns) <= set().union(*layout['usecols'].values())
+
+
+def test_county_worksheets_keep_their_own_side(monkeypatch):
+    monkeypatch.setattr(workbook_cache.pd, 'ExcelFile', SheetFile)
+
+    data = generate_CS.read_worksheets(year_layouts[2013], use_cache=False)
+
+    assert data.loc['PRESCRIBER COUNTY', 'PATIENT COUNTY'].isna().all()
+    assert data.loc['PATIENT COUNTY', 'PRESCRIBER COUNTY'].isna().all()
+    assert list(data.loc['PATIENT COUNTY', 'PATIENT COUNTY']) == ['PATIENT COUNTY 0', 'PATIENT COUNTY 1', 'PATIENT COUNTY 2']
+
+
+def test_read_worksheets_xlsx(tmp_path):
+    pytest.importorskip('openpyxl')
+    layout = dict(year_layouts[2013], workbook=str(tmp_path / 'report.xlsx'))
+    with pd.ExcelWriter(layout['workbook']) as writer:
+        for sheet_name in layout['worksheets']:
+            rows = worksheet_rows(sheet_name)
+            pd.DataFrame(rows[1:], columns=rows[0]).to_excel(writer, sheet_name=sheet_name, index=False)
+
+    data = generate_CS.read_worksheets(layout, use_cache=False)
+
+    assert len(data) == 6
+    assert data.loc['PRESCRIBER COUNTY', 'PATIENT COUNTY'].isna().all()
+
+
+@pytest.mark.parametrize('year', sorted(year_layouts))
+def test_synthetic_worksheets_are_real_shaped(year):
+    layout = year_layouts[year]
+
+    for sheet_name, worksheet in synthetic_worksheets(year, 5).items():
+        assert set(worksheet.columns) == set(worksheet_headers[sheet_name])
+        assert set(layout['usecols'][sheet_name]) <= set(worksheet.columns)
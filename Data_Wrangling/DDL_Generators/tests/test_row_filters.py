@@ -0,0 +1,96 @@
+import pandas as pd
+import pytest
+import generate_CS
+from row_filters import year_filters, pushdown, apply_filters
+from synthetic_reports import synthetic_worksheets
+from year_layouts import year_layouts
+
+filter_sets = [
+    {'DEA_Drug_Schedule': [2]},
+    {'PATIENT STATE': ['mi']},
+    {'PATIENT STATE': ['Michigan'], 'PATIENT COUNTY': ['kent', 'ST. JOSEPH', 'Grand Traverse']},
+    {'AHFS DESCRIPTION': ['benzodiazepines (anxiolytic)'], 'DEA_Drug_Schedule': [4]},
+]
+
+# Schedule 3 hydrocodone combination product moved to schedule 2 (see data_mappings.drug_rescheduling_mapping)
+rescheduled_drug = 'HYDROCODONE-ACETAMINOPHEN 10-325 MG TABLET'
+
+
+def parsed_rows(year, rows=400):
+    """
+    Builds a year's combined synthetic worksheets; in 2018-2022 some rows hold a rescheduled drug still reported as schedule 3.
+    """
+    worksheets = synthetic_worksheets(year, rows)
+    if year_layouts[year]['reschedule']:
+        for worksheet in worksheets.values():
+            worksheet.loc[:9, 'DRUG NAME/STRENGTH'] = rescheduled_drug
+            worksheet.loc[:9, 'AHFS DESCRIPTION'] = 'OPIATE AGONISTS'
+            worksheet.loc[:9, 'DRUG SCHEDULE'] = 'Schedule 3'
+    data = generate_CS.combine_worksheets(worksheets)
+    data['Prescription_Year'] = year
+    return data
+
+
+def filtered(data, filters, layout, push=True):
+    """
+    Transforms and filters parsed rows, with or without pushing the filters down first.
+
+    Categorical columns are compared by value, since their categories depend on the rows parsed.
+    """
+    if push:
+        data = pushdown(data, filters, layout)
+    data, _ = generate_CS.transform(data, layout)
+    data = apply_filters(data, filters).reset_index(drop=True)
+    return data.astype({column: object for column in data.select_dtypes('category').columns})
+
+
+@pytest.mark.parametrize('year', [2013, 2015, 2018, 2021])
+@pytest.mark.parametrize('filters', filter_sets)
+def test_pushdown_matches_filtering_after_transform(year, filters):
+    layout = year_layouts[year]
+    filters = year_filters(layout, filters)
+    data = parsed_rows(year)
+
+    expected = filtered(data.copy(), filters, layout, push=False)
+
+    assert len(expected)
+    pd.testing.assert_frame_equal(filtered(data, filters, layout), expected)
+
+
+def test_rescheduled_rows_pass_the_schedule_filter():
+    layout = year_layouts[2018]
+    filters = year_filters(layout, {'DEA_Drug_Schedule': [2]})
+    data = parsed_rows(2018)
+
+    kept = pushdown(data, filters, layout)
+    result, _ = generate_CS.transform(kept, layout)
+    result = apply_filters(result, filters)
+
+    rescheduled = [(worksheet, row) for worksheet in layout['worksheets'] for row in range(10)]
+    assert (kept.loc[rescheduled, 'DRUG SCHEDULE'] == 'Schedule 3').all()
+    assert (result.loc[rescheduled, 'DEA_Drug_Schedule'] == 2).all()
+    assert set(result['DEA_Drug_Schedule']) == {2}
+
+
+def test_year_filters():
+    assert year_filters(year_layouts[2013], {'PATIENT STATE': ['mi', 'Ohio'], 'PATIENT COUNTY': [' kent ']}) == {
+        'PATIENT STATE': ['Michigan', 'Ohio'], 'PATIENT COUNTY': ['Kent']
+    }
+    # 2015 only title-cases the county columns
+    assert year_filters(year_layouts[2015], {'PATIENT STATE': ['mi'], 'PATIENT COUNTY': ['kent']}) == {
+        'PATIENT STATE': ['Michigan'], 'PATIENT COUNTY': ['Kent']
+    }
+    assert year_filters(year_layouts[2018], {'DEA_Drug_Schedule': ['2']}) == {
+        'AHFS DESCRIPTION': ['OPIATE AGONISTS'], 'DEA_Drug_Schedule': [2]
+    }
+    assert year_filters(year_layouts[2018], {'AHFS DESCRIPTION': ['amphetamines']}) == {'AHFS DESCRIPTION': ['AMPHETAMINES']}
+
+
+def test_patient_filters_drop_prescriber_worksheet():
+    layout = year_layouts[2013]
+    data = parsed_rows(2013)
+
+    kept = pushdown(data, year_filters(layout, {'PATIENT STATE': ['MI']}), layout)
+
+    assert set(kept.index.get_level_values('Worksheet')) == {'PATIENT COUNTY'}
+    assert len(kept)
@@ -0,0 +1,150 @@
+import argparse
+import gzip
+import numpy as np
+import pandas as pd
+import pytest
+import generate_CS
+from sql_writer import sql_literals, tsv_fields, join_literals, insert_prefix, batched_inserts, bulk_load_header, bulk_load_footer
+from sql_writer import write_table, write_load_data, add_output_arguments
+from year_layouts import year_layouts
+
+# Text with every character the SQL and LOAD DATA formats escape
+awkward_text = pd.Series(["O'Brien", 'C:\\Temp', 'tab\there', 'two\nlines\r', 'nul\0', None, 'St. Joseph'])
+
+prefix = insert_prefix('Population', ['County', 'Population_Total'])
+
+
+def test_sql_text_literals():
+    assert sql_literals(awkward_text, 'text').tolist() == [
+        "'O\\'Brien'", "'C:\\\\Temp'", "'tab\there'", "'two\\nlines\\r'", "'nul\\0'", 'NULL', "'St. Joseph'"
+    ]
+
+
+def test_tsv_text_fields():
+    assert tsv_fields(awkward_text, 'text').tolist() == [
+        "O'Brien", 'C:\\\\Temp', 'tab\\there', 'two\\nlines\\r', 'nul\\0', '\\N', 'St. Joseph'
+    ]
+
+
+def test_numeric_literals():
+    values = pd.Series([3, 2.9, -2.9, np.nan, 'x', None], dtype=object)
+
+    assert sql_literals(values, 'int').tolist() == ['3', '2', '-2', 'NULL', 'NULL', 'NULL']
+    assert tsv_fields(values, 'int').tolist() == ['3', '2', '-2', '\\N', '\\N', '\\N']
+    assert sql_literals(pd.Series([18.79, np.nan, 2.0]), 'float').tolist() == ['18.79', 'NULL', '2.0']
+    assert sql_literals(pd.Series([18.79, np.nan], dtype='float32'), 'float').tolist() == ['18.79', 'NULL']
+
+
+def test_join_literals():
+    literals = [sql_literals(pd.Series(['Kent', None]), 'text'), sql_literals(pd.Series([1, 2]), 'int')]
+
+    assert join_literals(literals, ', ', '(', ')') == ["('Kent', 1)", '(NULL, 2)']
+
+
+def statement_rows(statement):
+    """
+    Splits a single- or multi-row INSERT statement into its value tuples.
+    """
+    assert statement.startswith(prefix.rstrip()) and statement.endswith(';')
+    return statement[len(prefix.rstrip()):-1].strip().split(',\n')
+
+
+def value_rows(count, width=1):
+    return [f"('{'x' * width}{row}', {row})" for row in range(count)]
+
+
+@pytest.mark.parametrize('batch_size, sizes', [(1, [1] * 7), (3, [3, 3, 1]), (7, [7]), (8, [7])])
+def test_batch_size_boundaries(batch_size, sizes):
+    rows = value_rows(7)
+
+    statements = list(batched_inserts(prefix, rows, batch_size))
+
+    assert [len(statement_rows(statement)) for statement in statements] == sizes
+    assert [row for statement in statements for row in statement_rows(statement)] == rows
+
+
+def test_single_row_statements():
+    assert list(batched_inserts(prefix, value_rows(2))) == [f"{prefix}('x0', 0);", f"{prefix}('x1', 1);"]
+
+
+def test_max_statement_bytes():
+    rows = value_rows(50, width=40)
+
+    statements = list(batched_inserts(prefix, rows, batch_size=1000, max_statement_bytes=300))
+
+    assert len(statements) > 1
+    assert all(len(statement.encode()) <= 300 for statement in statements)
+    assert [row for statement in statements for row in statement_rows(statement)] == rows
+
+
+def test_oversized_row_gets_its_own_statement():
+    rows = value_rows(3, width=400)
+
+    statements = list(batched_inserts(prefix, rows, batch_size=10, max_statement_bytes=300))
+
+    assert [statement_rows(statement) for statement in statements] == [[row] for row in rows]
+
+
+def prescription_rows(rows):
+    """
+    Builds transformed 2018 Prescription_Data rows.
+    """
+    data = pd.DataFrame({source: [1] * rows for _, source, kind in year_layouts[2018]['sql_columns'] if kind != 'text'})
+    for _, source, kind in year_layouts[2018]['sql_columns']:
+        if kind == 'text':
+            data[source] = 'Kent'
+    return data
+
+
+@pytest.mark.parametrize('batch_size', [1, 2])
+def test_bulk_load_wrapping(tmp_path, batch_size):
+    generate_CS.write_year(2018, prescription_rows(5), tmp_path, batch_size)
+
+    lines = (tmp_path / '2018_CS.SQL').read_text().splitlines()
+    statements = [line for line in lines if line.startswith('INSERT INTO')]
+    if batch_size == 1:
+        assert not set(bulk_load_header + bulk_load_footer) & set(lines)
+        assert len(statements) == 5
+    else:
+        header_start = lines.index(bulk_load_header[0])
+        assert lines[header_start:header_start + len(bulk_load_header)] == bulk_load_header
+        assert lines[header_start + len(bulk_load_header)].startswith('INSERT INTO')
+        assert lines[-len(bulk_load_footer):] == bulk_load_footer
+        assert len(statements) == 3
+
+
+def test_write_table(tmp_path):
+    path = write_table(tmp_path / 'ALL_Population.SQL', 'CREATE TABLE Population (...);', prefix, value_rows(3), 2, 'gzip')
+
+    assert path == tmp_path / 'ALL_Population.SQL.gz'
+    with gzip.open(path, 'rt') as file:
+        lines = file.read().splitlines()
+    assert lines[0] == 'CREATE TABLE Population (...);'
+    assert lines[1:1 + len(bulk_load_header)] == bulk_load_header
+    assert lines[-len(bulk_load_footer):] == bulk_load_footer
+
+
+def test_write_load_data(tmp_path):
+    script = write_load_data(tmp_path / 'ALL_Population.tsv', 'CREATE TABLE Population (...);', 'Population',
+                             ['County', 'Population_Total'], ['Kent\t1', 'Wayne\t2'], 'gzip')
+
+    assert script == tmp_path / 'ALL_Population_Load_Data.SQL'
+    with gzip.open(tmp_path / 'ALL_Population.tsv.gz', 'rt') as file:
+        assert file.read() == 'Kent\t1\nWayne\t2\n'
+    # LOAD DATA cannot read the compressed file, so the script names the decompressed one
+    text = script.read_text()
+    assert text.startswith('CREATE TABLE Population (...);\nLOAD DATA LOCAL INFILE')
+    assert f"'{(tmp_path / 'ALL_Population.tsv').as_posix()}'" in text
+    assert text.endswith('(County, Population_Total);\n')
+
+
+def test_output_arguments():
+    parser = argparse.ArgumentParser()
+    add_output_arguments(parser, 'ALL_Population.tsv')
+
+    args = parser.parse_args(['--batch-size', '500', '--load-data', '--compression', 'zstd'])
+
+    assert (args.batch_size, args.load_data, args.compression) == (500, True, 'zstd')
+    assert (parser.parse_args([]).batch_size, parser.parse_args([]).load_data) == (1, False)
+    with pytest.raises(SystemExit):
+        parser.parse_args(['--batch-size', '0'])
@@ -0,0 +1,67 @@
+import pandas as pd
+import generate_CS
+from validation import validate
+from year_layouts import year_layouts
+
+
+def county_worksheet(schedules, counts):
+    """
+    Builds a 2013-2017 county worksheet, including its summary row, with the given schedules and prescription counts.
+    """
+    return pd.DataFrame({
+        'DEA DRUG SCHEDULE': schedules + [None],
+        'PRESCRIPTION COUNT (#)': counts + [None],
+        'PRESCRIPTION QUANTITY (#)': [1] * len(counts) + [None]
+    })
+
+
+def validated(worksheets, year=2013):
+    layout = year_layouts[year]
+    data = generate_CS.combine_worksheets(worksheets).rename(columns=layout['column_mapping'])
+    return validate(data, layout)
+
+
+def test_rules():
+    errors = validated({'PRESCRIBER COUNTY': county_worksheet([2, 9, 'II', None, 3], [1, 'x', -4, None, '12'])})
+
+    assert errors.to_dict('records') == [
+        {'Worksheet': 'PRESCRIBER COUNTY', 'Row': 3, 'Column': 'DEA_Drug_Schedule', 'Value': 9, 'Rule': 'schedule'},
+        {'Worksheet': 'PRESCRIBER COUNTY', 'Row': 3, 'Column': 'Total_Prescriptions', 'Value': 'x', 'Rule': 'numeric'},
+        {'Worksheet': 'PRESCRIBER COUNTY', 'Row': 4, 'Column': 'DEA_Drug_Schedule', 'Value': 'II', 'Rule': 'schedule'},
+        {'Worksheet': 'PRESCRIBER COUNTY', 'Row': 4, 'Column': 'Total_Prescriptions', 'Value': -4, 'Rule': 'non_negative'}
+    ]
+
+
+def test_suffix_schedules():
+    layout = year_layouts[2018]
+    data = pd.DataFrame({
+        'DEA_Drug_Schedule': ['Schedule 2', 'Schedule 6', 'Schedule', 'Schedule 5'],
+        'Total_Prescriptions': [1, 1, 1, 1]
+    })
+
+    errors = validate(generate_CS.combine_worksheets({'Patient County': data}), layout)
+
+    assert list(errors['Row']) == [3, 4]
+    assert list(errors['Value']) == ['Schedule 6', 'Schedule']
+
+
+def test_rows_are_numbered_per_worksheet():
+    errors = validated({
+        'PRESCRIBER COUNTY': county_worksheet([2, 2, 7], [1, 1, 1]),
+        'PATIENT COUNTY': county_worksheet([7, 2], [-1, 1])
+    })
+
+    assert errors[['Worksheet', 'Row', 'Rule']].to_dict('records') == [
+        {'Worksheet': 'PRESCRIBER COUNTY', 'Row': 4, 'Rule': 'schedule'},
+        {'Worksheet': 'PATIENT COUNTY', 'Row': 2, 'Rule': 'schedule'},
+        {'Worksheet': 'PATIENT COUNTY', 'Row': 2, 'Rule': 'non_negative'}
+    ]
+
+
+def test_clean_rerun_removes_stale_errors(tmp_path):
+    errors = validated({'PRESCRIBER COUNTY': county_worksheet([9], [1])})
+    generate_CS.write_validation_errors(2013, errors, tmp_path)
+    assert (tmp_path / '2013_CS_Validation_Errors.csv').exists()
+
+    generate_CS.write_validation_errors(2013, errors.iloc[:0], tmp_path)
+    assert not (tmp_path / '2013_CS_Validation_Errors.csv').exists()
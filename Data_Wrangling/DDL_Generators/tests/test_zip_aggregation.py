@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import generate_CS
+from data_mappings import drug_name_mapping
+from year_layouts import year_layouts
+
+mme_column = 'AVERAGE DAILY MMEs (*ONLY CALCULATED FOR OPIATE AGONISTS AND OPIATE PARTIAL AGONISTS)'
+above_90_column = 'PRESCRIPTION COUNT GREATER THAN OR EQUAL TO 90 MMEs (*ONLY CALCULATED FOR OPIATE AGONISTS AND OPIATE PARTIAL AGONISTS)'
+
+
+def zip_worksheet(rows):
+    """
+    Builds a 'Patient Zip and County' worksheet from (county, zip code, prescription count, MME) rows.
+    """
+    counties, zip_codes, prescriptions, mmes = zip(*rows)
+    return pd.DataFrame({
+        'PATIENT COUNTY': counties,
+        'PATIENT STATE': 'MI',
+        'PATIENT ZIP': zip_codes,
+        'AGE RANGE': 'Ages 25 To 34',
+        'DRUG NAME/STRENGTH': sorted(drug_name_mapping)[0],
+        'AHFS DESCRIPTION': 'OPIATE AGONISTS',
+        'DRUG SCHEDULE': 'Schedule 2',
+        'PRESCRIPTION COUNT': prescriptions,
+        'PRESCRIPTION QUANTITY (DOSAGE UNITS)': 30,
+        'PATIENT COUNT': 1,
+        'DAYS SUPPLY': 10,
+        mme_column: mmes,
+        above_90_column: 0,
+        'AVERAGE DAYS SUPPLY': 10.0
+    })
+
+
+def rendered_mmes(rows):
+    """
+    Runs a zip-level worksheet through transform and returns the Average_Daily_MME SQL literal of every county.
+    """
+    layout = year_layouts[2021]
+    worksheet = zip_worksheet(rows)
+    data = generate_CS.combine_worksheets({layout['worksheets'][0]: pd.concat([worksheet, worksheet.iloc[:1]])})
+    data['Prescription_Year'] = 2021
+
+    data, _ = generate_CS.transform(data[layout['usecols'][layout['worksheets'][0]] + ['Prescription_Year']], layout)
+    return dict(zip(data['PATIENT COUNTY'], generate_CS.sql_literals(data['Average_Daily_MME'], 'float')))
+
+
+def test_single_zip_mmes_render_as_read():
+    # Values such as 1.35 do not survive float32 or a multiply-divide by the weight exactly
+    mmes = [1.35, 18.79, 39.78, 116.07, 5.95]
+    counties = ['Kent', 'Wayne', 'Ionia', 'Barry', 'Allegan']
+
+    rendered = rendered_mmes([(county, '49503', 3, mme) for county, mme in zip(counties, mmes)])
+
+    assert rendered == {county: str(mme) for county, mme in zip(counties, mmes)}
+
+
+def test_equal_zip_mmes_render_as_read():
+    rendered = rendered_mmes([('Kent', '49503', 3, 1.01), ('Kent', '49504', 7, 1.01)])
+
+    assert rendered == {'Kent': '1.01'}
+
+
+def test_weighted_zip_mmes():
+    rendered = rendered_mmes([('Kent', '49503', 1, 10.0), ('Kent', '49504', 3, 20.0), ('Kent', '49505', 2, np.nan),
+                              ('Wayne', '48201', 2, np.nan)])
+
+    assert rendered == {'Kent': '17.5', 'Wayne': 'NULL'}
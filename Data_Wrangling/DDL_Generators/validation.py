@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+# Count columns that must hold non-negative numbers when present in a year's dataset
+count_columns = ['Total_Prescriptions', 'Total_Units', 'Total_Patients', 'Total_Days_Supply']
+
+# Columns of the validation error table; tables of worksheet data start with a 'Worksheet' column
+validation_error_columns = ['Row', 'Column', 'Value', 'Rule']
+
+
+def error_rows(raw, mask, column, rule):
+    """
+    Builds validation error table rows for the values of a column selected by a mask.
+
+    Rows of combined worksheets (see generate_CS.combine_worksheets) are reported with their
+    worksheet name and their row number within that worksheet.
+
+    Args:
+        raw (pandas.Series): Column values as read from the worksheet.
+        mask (pandas.Series): Boolean mask of invalid values.
+        column (str): Column name.
+        rule (str): Name of the failed rule.
+
+    Returns:
+        pandas.DataFrame: Validation error rows.
+    """
+    invalid = raw[mask.to_numpy(dtype=bool)]
+    errors = pd.DataFrame({
+        'Row': invalid.index.get_level_values(-1) + 2,  # worksheet row number (header row + 0-based index)
+        'Column': column,
+        'Value': invalid.to_numpy(dtype=object),
+        'Rule': rule
+    }, columns=validation_error_columns)
+
+    if invalid.index.nlevels > 1:
+        errors.insert(0, 'Worksheet', invalid.index.get_level_values(0))
+    return errors
+
+
+def schedule_digits(raw, layout):
+    """
+    Extracts the DEA schedule number from raw DEA_Drug_Schedule values without converting them.
+
+    Suffix-format values such as 'Schedule 2' are parsed with a regex for their last digit. The
+    column only holds a handful of distinct values, so each distinct value is parsed once and
+    the results are taken back by code.
+
+    Args:
+        raw (pandas.Series): Raw DEA_Drug_Schedule values.
+        layout (dict): Year layout spec.
+
+    Returns:
+        pandas.Series: Schedule numbers, NaN where no number could be extracted.
+    """
+    codes, uniques = pd.factorize(raw)
+    values = pd.Series(uniques, dtype=object)
+
+    if layout['schedule_format'] == 'suffix':
+        values = values.astype(str).str.extract(r'(\d)\D*$', expand=False)
+
+    numbers = np.append(pd.to_numeric(values, errors='coerce').to_numpy(dtype=float), np.nan)
+    return pd.Series(numbers[codes], index=raw.index)
+
+
+def validate(data, layout):
+    """
+    Checks the count and schedule columns of a year's data column-wise.
+
+    Rules:
+        numeric: non-missing count values must be numbers.
+        non_negative: count values must not be negative.
+        schedule: non-missing DEA_Drug_Schedule values must contain a schedule number between 1 and 5.
+
+    Args:
+        data (pandas.DataFrame): Year data with renamed columns, before integer conversion.
+        layout (dict): Year layout spec.
+
+    Returns:
+        pandas.DataFrame: One row per invalid value with 'Row', 'Column', 'Value' and 'Rule' columns, preceded
+        by a 'Worksheet' column for combined worksheet data, in worksheet and row order.
+    """
+    errors = []
+
+    for col in count_columns:
+        if col not in data.columns:
+            continue
+
+        raw = data[col]
+        values = pd.to_numeric(raw, errors='coerce')
+        errors.append(error_rows(raw, values.isna() & raw.notna(), col, 'numeric'))
+        errors.append(error_rows(raw, values < 0, col, 'non_negative'))
+
+    raw = data['DEA_Drug_Schedule']
+    schedules = schedule_digits(raw, layout)
+    errors.append(error_rows(raw, raw.notna() & ~schedules.between(1, 5), 'DEA_Drug_Schedule', 'schedule'))
+
+    errors = pd.concat(errors, ignore_index=True)
+
+    # Order worksheets as they are listed in the layout rather than by name
+    worksheet_order = {sheet_name: position for position, sheet_name in enumerate(layout['worksheets'])}
+    return errors.sort_values([col for col in ['Worksheet', 'Row', 'Column'] if col in errors], kind='stable', ignore_index=True,
+                              key=lambda col: col.map(worksheet_order) if col.name == 'Worksheet' else col)
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import re
+import pandas as pd
+from pathlib import Path
+
+try:
+    import pyarrow
+except ImportError:  # Parquet snapshots are optional, worksheets are parsed directly without pyarrow
+    pyarrow = None
+
+# Directory parsed worksheet snapshots are stored in
+cache_dir = Path('Processed_Data/Workbook_Cache')
+
+# Content hashes of workbooks already hashed by this process, keyed by (path, size, mtime)
+_workbook_hashes = {}
+
+
+def workbook_hash(workbook):
+    """
+    Computes the SHA-256 content hash of a workbook, reusing the hash while the file is unchanged.
+
+    Args:
+        workbook (str): Path to the workbook.
+
+    Returns:
+        str: Hex digest of the workbook's contents.
+    """
+    stat = os.stat(workbook)
+    key = (str(Path(workbook).resolve()), stat.st_size, stat.st_mtime_ns)
+
+    if key not in _workbook_hashes:
+        digest = hashlib.sha256()
+        with open(workbook, 'rb') as workbook_file:
+            for chunk in iter(lambda: workbook_file.read(1 << 20), b''):
+                digest.update(chunk)
+        _workbook_hashes[key] = digest.hexdigest()
+
+    return _workbook_hashes[key]
+
+
+def snapshot_prefix(workbook, sheet_name):
+    """
+    Returns the file name prefix shared by every snapshot of a workbook's worksheet.
+
+    Args:
+        workbook (str): Path to the workbook.
+        sheet_name (str): Worksheet name.
+
+    Returns:
+        str: Snapshot file name prefix.
+    """
+    return re.sub(r'[^0-9A-Za-z]+', '_', f"{Path(workbook).stem}-{sheet_name}") + '-'
+
+
+def snapshot_path(workbook, sheet_name, cache_dir=cache_dir, usecols=None, dtype=None):
+    """
+    Returns the snapshot path for a worksheet, keyed by workbook content hash, sheet name and the columns read.
+
+    Args:
+        workbook (str): Path to the workbook.
+        sheet_name (str): Worksheet name.
+        cache_dir (Path): Snapshot directory.
+        usecols (list): Columns read from the worksheet, None for all columns.
+        dtype (dict): Types the columns are read as.
+
+    Returns:
+        Path: Parquet snapshot path.
+    """
+    key = hashlib.sha256(json.dumps([workbook_hash(workbook), usecols, dtype], sort_keys=True).encode()).hexdigest()
+    return Path(cache_dir) / f"{snapshot_prefix(workbook, sheet_name)}{key[:16]}.parquet"
+
+
+def write_snapshot(df, path):
+    """
+    Stores a parsed worksheet as a Parquet snapshot, replacing any stale snapshots of the same worksheet.
+
+    Worksheets with columns that Arrow cannot represent (e.g. mixed int/str object columns) are not cached.
+
+    Args:
+        df (pandas.DataFrame): Parsed worksheet.
+        path (Path): Snapshot path returned by snapshot_path.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Write to a temporary file first so parallel workers never read a partial snapshot
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        df.to_parquet(temp_path, index=False)
+    except pyarrow.ArrowException:
+        temp_path.unlink(missing_ok=True)
+        return
+    os.replace(temp_path, path)
+
+    # Remove snapshots taken from earlier versions of the workbook
+    prefix = path.name.rsplit('-', 1)[0]
+    for stale_path in path.parent.glob(f"{prefix}-*.parquet"):
+        if stale_path != path:
+            stale_path.unlink(missing_ok=True)
+
+
+def parse_worksheet(workbook, sheet_name, usecols=None, dtype=None):
+    """
+    Parses a worksheet, materializing only the requested columns.
+
+    Args:
+        workbook (str): Path to the workbook.
+        sheet_name (str): Worksheet name.
+        usecols (list): Column names to read, None for all columns.
+        dtype (dict): Types to read columns as, e.g. {'PATIENT COUNTY': 'str'}.
+
+    Returns:
+        pandas.DataFrame: Parsed worksheet.
+    """
+    return pd.ExcelFile(Path(workbook)).parse(sheet_name, usecols=usecols, dtype=dtype)
+
+
+def read_worksheet(workbook, sheet_name, use_cache=True, cache_dir=cache_dir, usecols=None, dtype=None):
+    """
+    Reads a worksheet, using a Parquet snapshot of a previous parse when the workbook is unchanged.
+
+    Args:
+        workbook (str): Path to the workbook.
+        sheet_name (str): Worksheet name.
+        use_cache (bool): Whether snapshots are read and written.
+        cache_dir (Path): Snapshot directory.
+        usecols (list): Column names to read, None for all columns.
+        dtype (dict): Types to read columns as.
+
+    Returns:
+        pandas.DataFrame: Parsed worksheet.
+    """
+    if not use_cache or pyarrow is None:
+        return parse_worksheet(workbook, sheet_name, usecols, dtype)
+
+    path = snapshot_path(workbook, sheet_name, cache_dir, usecols, dtype)
+    if path.exists():
+        return pd.read_parquet(path)
+
+    df = parse_worksheet(workbook, sheet_name, usecols, dtype)
+    write_snapshot(df, path)
+    return df
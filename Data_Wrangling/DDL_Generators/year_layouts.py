@@ -0,0 +1,228 @@
+# Per-year layout specs for the Michigan Drug Utilization Report workbooks.
+#
+# Each reporting year is described by a plain dict that tells generate_CS.py where the
+# workbook lives, which worksheets to read and which columns to read from each of them, how to rename its columns and which
+# cleaning steps apply. Adding a new reporting year only requires adding an entry to year_layouts.
+
+# Column names used by the 2013-2017 reports (prescriber + patient county worksheets)
+county_column_mapping = {
+    'PRESCRIPTION COUNT (#)': 'Total_Prescriptions',
+    'PRESCRIPTION QUANTITY (#)': 'Total_Units',
+    'DEA DRUG SCHEDULE': 'DEA_Drug_Schedule',
+    'DRUG NAME/STRENGTH': 'Drug_Name_Strength',
+}
+
+# Column names used by the 2018-2022 reports (patient worksheets stratified by age range)
+patient_column_mapping = {
+    'PRESCRIPTION COUNT': 'Total_Prescriptions',
+    'PRESCRIPTION QUANTITY (DOSAGE UNITS)': 'Total_Units',
+    'DRUG SCHEDULE': 'DEA_Drug_Schedule',
+    'DRUG NAME/STRENGTH': 'Drug_Name_Strength',
+    'AGE RANGE': 'Patient_Age_Bracket',
+    'PATIENT COUNT': 'Total_Patients',
+    'DAYS SUPPLY': 'Total_Days_Supply',
+    'AVERAGE DAILY MMEs (*ONLY CALCULATED FOR OPIATE AGONISTS AND OPIATE PARTIAL AGONISTS)': 'Average_Daily_MME',
+    'PRESCRIPTION COUNT GREATER THAN OR EQUAL TO 90 MMEs (*ONLY CALCULATED FOR OPIATE AGONISTS AND OPIATE PARTIAL AGONISTS)': 'Total_Above_90MME'
+}
+
+# Text columns read as strings, whatever type the worksheet cells have; other columns keep the
+# type they are parsed with
+county_dtypes = {column: 'str' for column in ['PRESCRIBER COUNTY', 'PRESCRIBER STATE', 'PATIENT COUNTY', 'PATIENT STATE',
+                                              'DRUG NAME/STRENGTH', 'AHFS DESCRIPTION']}
+
+patient_dtypes = {column: 'str' for column in ['PATIENT COUNTY', 'PATIENT STATE', 'AGE RANGE', 'DRUG NAME/STRENGTH',
+                                               'AHFS DESCRIPTION', 'DRUG SCHEDULE']}
+
+# Compact dtypes of the transformed Prescription_Data columns (see generate_CS.compact_dtypes).
+# Integer columns holding a value outside the dtype's range fall back to Int64, float columns
+# with values float32 cannot represent exactly (to their shortest repr) fall back to float64.
+column_dtypes = {
+    'Prescription_Year': 'UInt16',
+    'DEA_Drug_Schedule': 'Int8',
+    'Total_Prescriptions': 'UInt32',
+    'Total_Units': 'UInt32',
+    'Total_Patients': 'UInt32',
+    'Total_Days_Supply': 'UInt32',
+    'Total_Above_90MME': 'UInt32',
+    'Average_Daily_MME': 'float32',
+    'PRESCRIBER COUNTY': 'category',
+    'PRESCRIBER STATE': 'category',
+    'PATIENT COUNTY': 'category',
+    'PATIENT STATE': 'category',
+    'Patient_Age_Bracket': 'category',
+    'Drug_Name_Strength': 'category',
+    'AHFS DESCRIPTION': 'category',
+    'CS_Component': 'category'
+}
+
+# Prescription_Data table definitions
+county_ddl_columns = [
+    "Prescription_Category_ID INT PRIMARY KEY AUTO_INCREMENT",
+    "Prescription_Year YEAR",
+    "Prescriber_County VARCHAR(255)",
+    "Prescriber_State VARCHAR(255)",
+    "Patient_County VARCHAR(255)",
+    "Patient_State VARCHAR(255)",
+    "Patient_Age_Bracket VARCHAR(255)",
+    "Drug_Name_Strength VARCHAR(255)",
+    "DEA_Drug_Schedule INT",
+    "AHFS_Description VARCHAR(255)",
+    "CS_Component VARCHAR(255)",
+    "Total_Prescriptions INT",
+    "Total_Units INT",
+    "Total_Patients INT",
+    "Total_Days_Supply INT",
+    "Average_Daily_MME FLOAT",
+    "Total_Above_90MME INT"
+]
+
+patient_ddl_columns = [
+    "Prescription_Category_ID INT PRIMARY KEY AUTO_INCREMENT",
+    "Prescription_Year YEAR",
+    "Patient_County VARCHAR(25)",
+    "Patient_State VARCHAR(25)",
+    "Patient_Age_Bracket VARCHAR(25)",
+    "Drug_Name_Strength VARCHAR(100)",
+    "DEA_Drug_Schedule INT",
+    "AHFS_Description VARCHAR(25)",
+    "CS_Component VARCHAR(25)",
+    "Total_Prescriptions INT",
+    "Total_Units INT",
+    "Total_Patients INT",
+    "Total_Days_Supply INT",
+    "Average_Daily_MME FLOAT",
+    "Total_Above_90MME INT"
+]
+
+# Prescription_Data definition holding every reporting year's columns, used when all years are
+# loaded into the same table. Patient_Zip is kept for existing databases; the 2021-2022 zip-level
+# rows are aggregated to county level, so it is always NULL.
+all_years_ddl_columns = county_ddl_columns[:6] + ["Patient_Zip VARCHAR(25)"] + county_ddl_columns[6:]
+
+# INSERT column order as (SQL column, DataFrame column, value kind); a DataFrame column of
+# None means the column is not present in that year's dataset and is always NULL
+county_sql_columns = [
+    ('Prescription_Year', 'Prescription_Year', 'int'),
+    ('Prescriber_County', 'PRESCRIBER COUNTY', 'text'),
+    ('Prescriber_State', 'PRESCRIBER STATE', 'text'),
+    ('Patient_County', 'PATIENT COUNTY', 'text'),
+    ('Patient_State', 'PATIENT STATE', 'text'),
+    ('Patient_Age_Bracket', None, 'text'),
+    ('Drug_Name_Strength', 'Drug_Name_Strength', 'text'),
+    ('DEA_Drug_Schedule', 'DEA_Drug_Schedule', 'int'),
+    ('AHFS_Description', 'AHFS DESCRIPTION', 'text'),
+    ('CS_Component', 'CS_Component', 'text'),
+    ('Total_Prescriptions', 'Total_Prescriptions', 'int'),
+    ('Total_Units', 'Total_Units', 'int'),
+    ('Total_Patients', None, 'int'),
+    ('Total_Days_Supply', None, 'int'),
+    ('Average_Daily_MME', None, 'float'),
+    ('Total_Above_90MME', None, 'int')
+]
+
+patient_sql_columns = [
+    ('Prescription_Year', 'Prescription_Year', 'int'),
+    ('Patient_County', 'PATIENT COUNTY', 'text'),
+    ('Patient_State', 'PATIENT STATE', 'text'),
+    ('Patient_Age_Bracket', 'Patient_Age_Bracket', 'text'),
+    ('Drug_Name_Strength', 'Drug_Name_Strength', 'text'),
+    ('DEA_Drug_Schedule', 'DEA_Drug_Schedule', 'int'),
+    ('AHFS_Description', 'AHFS DESCRIPTION', 'text'),
+    ('CS_Component', 'CS_Component', 'text'),
+    ('Total_Prescriptions', 'Total_Prescriptions', 'int'),
+    ('Total_Units', 'Total_Units', 'int'),
+    ('Total_Patients', 'Total_Patients', 'int'),
+    ('Total_Days_Supply', 'Total_Days_Supply', 'int'),
+    ('Average_Daily_MME', 'Average_Daily_MME', 'float'),
+    ('Total_Above_90MME', 'Total_Above_90MME', 'int')
+]
+
+
+def county_layout(workbook, titlecase_columns=('PRESCRIBER COUNTY', 'PRESCRIBER STATE', 'PATIENT COUNTY', 'PATIENT STATE')):
+    """
+    Builds the layout spec shared by the 2013-2017 reports.
+
+    Args:
+        workbook (str): Path to the year's workbook, relative to the repository root.
+        titlecase_columns (tuple): Columns converted to titlecase.
+
+    Returns:
+        dict: Layout spec.
+    """
+    return {
+        'workbook': workbook,
+        'worksheets': ['PRESCRIBER COUNTY', 'PATIENT COUNTY'],
+        # Each worksheet only holds the county and state columns of its own side
+        'usecols': {
+            'PRESCRIBER COUNTY': ['PRESCRIBER COUNTY', 'PRESCRIBER STATE', 'AHFS DESCRIPTION'] + list(county_column_mapping),
+            'PATIENT COUNTY': ['PATIENT COUNTY', 'PATIENT STATE', 'AHFS DESCRIPTION'] + list(county_column_mapping)
+        },
+        'dtypes': county_dtypes,
+        'column_mapping': county_column_mapping,
+        'state_columns': ['PATIENT STATE', 'PRESCRIBER STATE'],
+        'titlecase_columns': list(titlecase_columns),
+        'uppercase_columns': ['Drug_Name_Strength', 'AHFS DESCRIPTION'],
+        'integer_columns': ['DEA_Drug_Schedule', 'Total_Prescriptions', 'Total_Units'],
+        'schedule_format': 'number',  # e.g. 2
+        'reschedule': False,
+        'cs_component_fill': None,  # keep the drug name when no CS_Component mapping exists
+        'row_filters': {},  # allowed values per transformed column, see row_filters.py
+        'aggregate_zip': False,
+        'ddl_columns': county_ddl_columns,
+        'sql_columns': county_sql_columns
+    }
+
+
+def patient_layout(workbook, worksheet='Patient County', column_mapping=None, aggregate_zip=False,
+                   ddl_columns=None, sql_columns=None):
+    """
+    Builds the layout spec shared by the 2018-2022 reports.
+
+    Args:
+        workbook (str): Path to the year's workbook, relative to the repository root.
+        worksheet (str): Name of the patient worksheet.
+        column_mapping (dict): Column name mapping, defaults to patient_column_mapping.
+        aggregate_zip (bool): Whether rows stratified only by zip code are aggregated to county level.
+        ddl_columns (list): Prescription_Data column definitions, defaults to patient_ddl_columns.
+        sql_columns (list): INSERT column spec, defaults to patient_sql_columns.
+
+    Returns:
+        dict: Layout spec.
+    """
+    column_mapping = column_mapping or patient_column_mapping
+
+    return {
+        'workbook': workbook,
+        'worksheets': [worksheet],
+        'usecols': {worksheet: ['PATIENT COUNTY', 'PATIENT STATE', 'AHFS DESCRIPTION'] + list(column_mapping)},
+        'dtypes': patient_dtypes,
+        'column_mapping': column_mapping,
+        'state_columns': ['PATIENT STATE'],
+        'titlecase_columns': ['PATIENT COUNTY', 'PATIENT STATE'],
+        'uppercase_columns': ['Drug_Name_Strength', 'AHFS DESCRIPTION'],
+        'integer_columns': ['Total_Prescriptions', 'Total_Units', 'Total_Patients', 'Total_Days_Supply'],
+        'schedule_format': 'suffix',  # e.g. 'Schedule 2', the schedule is the last character
+        'reschedule': True,
+        'cs_component_fill': 'NULL',
+        'row_filters': {'AHFS DESCRIPTION': ['OPIATE AGONISTS']},  # only insert rows with these AHFS descriptions
+        'aggregate_zip': aggregate_zip,
+        'ddl_columns': ddl_columns or patient_ddl_columns,
+        'sql_columns': sql_columns or patient_sql_columns
+    }
+
+
+year_layouts = {
+    2013: county_layout('Raw_Data/CS_Data/2013/Drug Utilization Report Data - 2013.xlsx'),
+    2014: county_layout('Raw_Data/CS_Data/2014/Drug Utilization Report Data - 2014.xlsx'),
+    2015: county_layout('Raw_Data/CS_Data/2015/Drug Utilization Report Data - 2015.xlsx',
+                        titlecase_columns=('PRESCRIBER COUNTY', 'PATIENT COUNTY')),
+    2016: county_layout('Raw_Data/CS_Data/2016/Drug Utilization Report Data - 2016.xlsx'),
+    2017: county_layout('Raw_Data/CS_Data/2017/Drug Utilization Report Data - 2017.xlsx'),
+    2018: patient_layout('Raw_Data/CS_Data/2018/2018_Michigan_Drug_Utilization_Report_FINAL.xlsx'),
+    2019: patient_layout('Raw_Data/CS_Data/2019/2019_Michigan_Drug_Utilization_Report_FINAL.xlsb'),
+    2020: patient_layout('Raw_Data/CS_Data/2020/2020_Michigan_Drug_Utilization_Report_FINAL.xlsx'),
+    2021: patient_layout('Raw_Data/CS_Data/2021/2021_Michigan_Drug_Utilization_Report_FINAL.xlsb',
+                         worksheet='Patient Zip and County', aggregate_zip=True),
+    2022: patient_layout('Raw_Data/CS_Data/2022/2022_Michigan_Drug_Utilization_Report_FINAL.xlsb',
+                         worksheet='Patient Zip and County', aggregate_zip=True)
+}